@@ -7,6 +7,9 @@ from pydantic import BaseSettings
 class Settings(BaseSettings):
     qcew_api_url = 'http://data.bls.gov/cew/data/api'
 
+    lp_solver = 'ecos'
+    lp_presolve = True
+
     ownership_code = 5
 
     root_aggregation = 71
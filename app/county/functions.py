@@ -1,12 +1,14 @@
 """
 Functions for county level estimation
 """
-import cvxpy as cp
 import numpy as np
 
-from helpers import get_undisclosed_data, get_lp_variables
-from tree import write_into, get_objective, get_constraints, fetch_branch
-from config import settings
+from .helpers import get_undisclosed_data
+from ..states.array_tree import ArrayTree
+from ..states.lp import set_linear_programming, solve_linear_programming
+from .scaling import scale_trees
+from ..states.tree import index_tree
+from .config import settings
 
 
 def run_proportional_scaling(county, industry, data):
@@ -16,41 +18,38 @@ def run_proportional_scaling(county, industry, data):
     if len(industry['ind']) < settings.max_digits_of_naics:
         undisclosed = get_undisclosed_data(industry, data)
         if np.sum(undisclosed['est']) > 0:
+            subindustries = {subindustry['ind']: subindustry for subindustry in industry['children']}
             for i,subind in enumerate(undisclosed['ind']):
-                data = {
+                subindustries[subind].update({
                 'emp_ps': undisclosed['emp'] * undisclosed['est'][i]/np.sum(undisclosed['est']),
                 'wages_ps': undisclosed['wages'] * undisclosed['est'][i]/np.sum(undisclosed['est']),
-                }
-                county = write_into(county, 'ind', subind, data)
+                })
     return county
 
 
+def run_proportional_scaling_sweep(counties):
+    """
+    Return the trees with proportional scaling (ps) results for all their industries, computed
+    for all the trees at once in one top-down sweep over array trees
+    """
+    array_trees = scale_trees([ArrayTree.from_dict(county) for county in counties])
+    return [array_tree.to_dict() for array_tree in array_trees]
+
+
 def run_linear_programming(county, key):
     """
     Return the given tree with linear programming results in it
     """
-    objective_function = get_objective(county, key, str(county[key]))
-    constraints = get_constraints(county, key, [])
-    variables = get_lp_variables(constraints, key)
-    for variable in variables:
-        exec(f"{variable} = cp.Variable()", globals())
-    exec(f"objective = cp.Minimize(cp.abs({objective_function}))")
-    numerical_constraints = []
-    for i,constraint in enumerate(constraints):
-        if i > 0:
-            numerical_constraints.append(eval(f"{constraint.replace('=','==')}"))
-    for variable in variables:
-        numerical_constraints.append(eval(f"{variable}>= 0"))
-    problem = cp.Problem(locals()['objective'], numerical_constraints)
-    problem.solve(solver=cp.ECOS)
-    for variable in variables:
-        ind = variable[variable.find('_')+1:-1]
-        branch = fetch_branch(county, 'ind', ind)
-        if branch[key] == 0:
-            write_into(
-                county, 'ind', branch['ind'],
-                {f'{key}_lp': branch['est'] * eval(f"float({variable}.value)")}
-            )
+    c, d, A, b, variables = set_linear_programming(county, key)
+    if len(variables) > 0:
+        x, _ = solve_linear_programming(
+            c, d, A, b, backend=settings.lp_solver, presolve=settings.lp_presolve
+        )
+        nodes = index_tree(county)
+        for ind, x_j in zip(variables, x):
+            branch = nodes[ind]
+            if branch[key] == 0:
+                branch[f'{key}_lp'] = branch['est'] * float(x_j)
     return county
 
 
@@ -58,8 +57,9 @@ def save_data_to_time_series(time_series, county, industry_codes, key, year):
     """
     Returns time series that contains all the industries across time
     """
+    nodes = index_tree(county)
     for ind in industry_codes:
-        industry = fetch_branch(county, 'ind', ind)
+        industry = nodes.get(ind)
         if industry is not None:
             if industry.get(f'{key}_lp') is not None:
                 time_series.at[year, ind] = industry[f'{key}_lp']
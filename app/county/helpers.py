@@ -1,8 +1,10 @@
+import re
+
 import numpy as np
 import pandas as pd
-import re
 
-from config import settings
+from ..states.cache import fetch_cached
+from .config import settings
 
 
 def fetch_area_data(year, quarter, area):
@@ -10,7 +12,7 @@ def fetch_area_data(year, quarter, area):
     Return a pandas table from BLS given year, quarter (a for year), and area code
     """
     url_path = f'{settings.qcew_api_url}/{year}/{quarter}/area/{area}.csv'
-    df = pd.read_csv(url_path)
+    df = pd.read_csv(fetch_cached('area', year, quarter, area))
     df['industry_code'] = df['industry_code'].str.replace(
         '-',
         settings.string_connecting_codes
@@ -23,7 +25,7 @@ def fetch_industry_data(year, quarter, industry):
     Return a pandas table from BLS given year, quarter (a for year), and NAICS code
     """
     url_path = f'{settings.qcew_api_url}/{year}/{quarter}/industry/{industry}.csv'
-    return pd.read_csv(url_path)
+    return pd.read_csv(fetch_cached('industry', year, quarter, industry))
 
 
 def adjust_aggregation_code(aggregation):
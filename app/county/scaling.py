@@ -0,0 +1,63 @@
+"""
+Proportional scaling of all the undisclosed industries of county trees in one top-down sweep
+"""
+import numpy as np
+
+from .config import settings
+
+
+def scale_arrays(ind, columns, parent, depth):
+    """
+    Return the emp_ps and wages_ps columns of trees stored as parallel arrays, NaN where no
+    proportional scaling applies: level by level from the root, the undisclosed remainder of
+    every parent is shared among its undisclosed children by their establishments
+    """
+    n = len(parent)
+    est = columns['est'].astype(float)
+    undisclosed = columns['emp'] == 0
+    scalable = np.char.str_len(ind.astype(str)) < settings.max_digits_of_naics
+    children = np.flatnonzero(parent >= 0)
+    undisclosed_est = np.bincount(
+        parent[children], weights=(est * undisclosed)[children], minlength=n
+    )
+    levels = [
+        np.flatnonzero((depth == level) & undisclosed) for level in range(1, int(depth.max()) + 1)
+    ]
+    scaled = {}
+    for key in ('emp', 'wages'):
+        values = columns[key].astype(float)
+        disclosed = np.bincount(parent[children], weights=values[children], minlength=n)
+        key_ps = np.full(n, np.nan)
+        for rows in levels:
+            parents = parent[rows]
+            applies = scalable[parents] & (undisclosed_est[parents] > 0)
+            rows, parents = rows[applies], parents[applies]
+            total = np.where(
+                (est[parents] > 0) & undisclosed[parents], key_ps[parents], values[parents]
+            )
+            key_ps[rows] = (total - disclosed[parents]) * est[rows] / undisclosed_est[parents]
+        scaled[f'{key}_ps'] = key_ps
+    return scaled
+
+
+def scale_trees(trees):
+    """
+    Add the emp_ps and wages_ps columns to array trees, all of them solved as one batch
+    """
+    if len(trees) == 0:
+        return trees
+    sizes = [len(tree) for tree in trees]
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    scaled = scale_arrays(
+        np.concatenate([tree.ind.astype(str) for tree in trees]),
+        {key: np.concatenate([tree.columns[key] for tree in trees]) for key in ('est', 'emp', 'wages')},
+        np.concatenate([
+            np.where(tree.parent >= 0, tree.parent + start, -1)
+            for tree, start in zip(trees, starts)
+        ]),
+        np.concatenate([tree.depth for tree in trees]),
+    )
+    for tree, start, size in zip(trees, starts, sizes):
+        for key, column in scaled.items():
+            tree.columns[key] = column[start:start + size]
+    return trees
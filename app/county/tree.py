@@ -4,8 +4,9 @@ Tree methods for county level optimization
 import numpy as np
 import numexpr as ne
 
-from helpers import get_variables, get_children_codes, adjust_aggregation_code
-from config import settings
+from .helpers import adjust_aggregation_code
+from ..states.area_index import index_area_data, get_indexed_variables, get_indexed_children_codes
+from .config import settings
 
 
 def fetch_branch(tree, key, value):
@@ -49,14 +50,25 @@ def build_tree(df, code, aggregation):
     """
     Return the complete tree with nodes and leaves
     """
+    columns = {
+        'est': settings.establishments, 'emp': settings.employment, 'wages': settings.wages
+    }
+    index = index_area_data(df, settings.highest_aggregation, columns, settings.ownership_code)
+    return build_branch(index, code, aggregation)
+
+
+def build_branch(index, code, aggregation):
+    """
+    Return the branch with nodes and leaves given an indexed area table
+    """
     if code is not None:
         aggregation = adjust_aggregation_code(aggregation)
-        est, emp, wages = get_variables(df, code, aggregation)
-        children_codes = get_children_codes(df, code, aggregation)
+        est, emp, wages = get_indexed_variables(index, code, aggregation)
+        children_codes = get_indexed_children_codes(index, code, aggregation)
         children = []
         if aggregation <= settings.lowest_aggregation:
             for child_code in children_codes:
-                children.append(build_tree(df, child_code, aggregation+1))
+                children.append(build_branch(index, child_code, aggregation+1))
         return {'ind': code, 'est': est, 'emp': emp, 'wages': wages,'children':children}
 
 
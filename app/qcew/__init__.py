@@ -0,0 +1,3 @@
+"""
+Estimation of undisclosed QCEW data, run with: python -m app.qcew estimate --state 37
+"""
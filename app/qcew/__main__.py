@@ -0,0 +1,6 @@
+"""
+Run the command line interface with python -m app.qcew
+"""
+from app.qcew.cli import main
+
+main()
@@ -0,0 +1,225 @@
+"""
+Command line interface: qcew estimate --state 37 --years 2014-2021 --key emp --workers 8
+"""
+import argparse
+import cProfile
+import os
+import sys
+
+from ..states.benchmark import benchmark
+from ..states.constraints import split_measure
+from ..states.instrument import print_summary, reset, timer, write_report
+from ..states.milestones import check_state
+from ..states.pipeline import estimate_state, get_periods
+from ..states.scheduler import print_jobs, schedule_states, state_codes
+from ..states.shards import list_shards, load_state
+
+from ..states.config import settings
+
+
+def parse_years(text):
+    """
+    Return the list of years of 2014-2021, 2014,2016 or 2014
+    """
+    years = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            years += list(range(int(first), int(last) + 1))
+        else:
+            years.append(int(part))
+    return years
+
+
+def parse_states(text):
+    """
+    Return the list of state codes of 33,37 or all for the 50 states and the District of Columbia
+    """
+    if text == 'all':
+        return list(state_codes)
+    return [code.strip() for code in text.split(',') if code.strip()]
+
+
+def parse_measures(text):
+    """
+    Return the list of measures of emp,wages,emp_est
+    """
+    return [measure.strip() for measure in text.split(',') if measure.strip()]
+
+
+def get_parser():
+    """
+    Return the parser of the estimate, check, schedule and benchmark commands
+    """
+    parser = argparse.ArgumentParser(prog='qcew', description='Estimate undisclosed QCEW data')
+    commands = parser.add_subparsers(dest='command', required=True)
+    estimate = commands.add_parser(
+        'estimate', help='estimate the undisclosed data of a state and write its shards'
+    )
+    check = commands.add_parser(
+        'check', help='check the estimated shards of a state and write its time series'
+    )
+    scheduled = commands.add_parser(
+        'schedule', help='estimate many states as (state, year) jobs in a pool of processes'
+    )
+    for command in (estimate, check):
+        command.add_argument('--state', required=True, help='state FIPS code, e.g. 37')
+    scheduled.add_argument(
+        '--states', required=True, type=parse_states, help='e.g. 33,37 or all'
+    )
+    for command in (estimate, check, scheduled):
+        command.add_argument(
+            '--years', required=True, type=parse_years, help='e.g. 2014-2021 or 2014,2016'
+        )
+        command.add_argument(
+            '--key', type=parse_measures,
+            help='measures estimated together, e.g. emp,wages; emp_est and wages_est weight the '
+            'LP by establishments (emp by default, emp1,emp2,emp3 for quarters)'
+        )
+        command.add_argument(
+            '--period', default='a',
+            help='a for annual averages, a quarter 1 to 4, or q for the months of all the quarters'
+        )
+    for command in (estimate, check):
+        command.add_argument(
+            '--name', help='prefix of the output files, e.g. North_Carolina (the state code by default)'
+        )
+    for command in (estimate, check, scheduled):
+        command.add_argument(
+            '--report', default=settings.report_path,
+            help='JSON run report of the timers and counters of every stage'
+        )
+        command.add_argument(
+            '--profile', help='write the cProfile stats of the run to this file, e.g. run.prof'
+        )
+    estimate.add_argument(
+        '--workers', type=int, default=settings.lp_workers, help='processes solving the years'
+    )
+    estimate.add_argument(
+        '--resume', action='store_true', help='skip the stages checkpointed with the same inputs'
+    )
+    estimate.add_argument(
+        '--checkpoint', action='store_true',
+        help='checkpoint the stages for a later --resume, which checkpoints them as well'
+    )
+    estimate.add_argument(
+        '--check', action='store_true', help='check the estimates and write the time series'
+    )
+    scheduled.add_argument(
+        '--jobs', type=int, default=settings.scheduler_workers, help='processes running the jobs'
+    )
+    scheduled.add_argument(
+        '--memory', type=float, default=settings.scheduler_memory_budget / 1024**3,
+        help='GiB the running jobs are expected to take at most'
+    )
+    bench = commands.add_parser(
+        'benchmark', help='time the stages of a run on a synthetic state, offline'
+    )
+    bench.add_argument('--counties', type=int, default=20, help='counties of the synthetic state')
+    bench.add_argument('--suppression', type=float, default=0.3, help='share of suppressed cells')
+    bench.add_argument('--branching', type=int, default=4, help='most children of a NAICS node')
+    bench.add_argument(
+        '--coverage', type=float, default=0.5, help='share of the 6 digit industries of a county'
+    )
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--repeats', type=int, default=3)
+    bench.add_argument('--key', default=settings.employment_abbreviation, help='emp or wages')
+    bench.add_argument(
+        '--output', default='benchmarks.jsonl', help='JSON lines file the results are appended to'
+    )
+    return parser
+
+
+def get_measures(arguments):
+    """
+    Return the measures of the command line, by default employment for annual averages and the
+    employment of the three months of a quarter otherwise
+    """
+    if arguments.key is not None:
+        return arguments.key
+    if arguments.period == 'a':
+        return [settings.employment_abbreviation]
+    return [
+        f'{settings.employment_abbreviation}{month}'
+        for month in range(1, len(settings.monthly_employment) + 1)
+    ]
+
+
+def load_estimated_state(state_code, years):
+    """
+    Return {year: {area: tree}} of the shards of a state
+    """
+    areas = {area for _, area in list_shards(settings.shard_dir, years) if area.startswith(state_code)}
+    state = load_state(settings.shard_dir, years, areas)
+    missing_years = [year for year in years if year not in state]
+    if len(missing_years) > 0:
+        raise Exception(f'No estimated trees of state {state_code} for {missing_years}.')
+    return state
+
+
+def check_measures(state, years, measures, name):
+    """
+    Check the estimates of the measures that are not weighted by establishments
+    """
+    for measure in measures:
+        if not split_measure(measure)[1]:
+            with timer('check', measure=measure):
+                check_state(state, years, measure, name)
+
+
+def run(arguments):
+    """
+    Run the estimate, check or schedule command and return what its run report adds
+    """
+    measures = get_measures(arguments)
+    if arguments.command == 'schedule':
+        jobs = schedule_states(
+            arguments.states, arguments.years, arguments.period, measures, arguments.jobs,
+            arguments.memory * 1024**3
+        )
+        print_jobs(jobs)
+        return {'states': arguments.states, 'jobs': jobs}
+    name = arguments.name or arguments.state
+    periods = [label for label, _, _ in get_periods(arguments.years, arguments.period)]
+    if arguments.command == 'estimate':
+        state = estimate_state(
+            arguments.state, arguments.years, measures, arguments.period, arguments.workers,
+            arguments.resume, checkpoint=arguments.checkpoint
+        )
+        if arguments.check:
+            check_measures(state, periods, measures, name)
+    elif arguments.command == 'check':
+        with timer('load_shards'):
+            state = load_estimated_state(arguments.state, periods)
+        check_measures(state, periods, measures, name)
+    return {}
+
+
+def main(argv=None):
+    """
+    Run the command given on the command line
+    """
+    arguments = get_parser().parse_args(argv)
+    if arguments.command == 'benchmark':
+        benchmark(
+            arguments.output, counties=arguments.counties, suppression=arguments.suppression,
+            branching=arguments.branching, coverage=arguments.coverage, seed=arguments.seed,
+            repeats=arguments.repeats, key=arguments.key
+        )
+        return
+    reset()
+    with timer('run'):
+        if arguments.profile:
+            profiler = cProfile.Profile()
+            metadata = profiler.runcall(run, arguments)
+            profiler.dump_stats(arguments.profile)
+        else:
+            metadata = run(arguments)
+    summary = write_report(
+        arguments.report, command=sys.argv if argv is None else ['qcew'] + list(argv),
+        pid=os.getpid(), state=getattr(arguments, 'state', None), years=arguments.years,
+        key=get_measures(arguments), period=arguments.period, solver=settings.lp_solver,
+        workers=getattr(arguments, 'workers', None), **metadata
+    )
+    print(f'Run report written to {arguments.report}')
+    print_summary(summary)
@@ -0,0 +1,86 @@
+"""
+Index of an area table for building trees without scanning the table at every node
+"""
+from .config import settings
+
+
+def search_prefixes(code):
+    """
+    Return the prefixes children codes start with e.g. ('31', '32', '33') for '31_33'
+    """
+    if settings.string_connecting_codes in code:
+        return tuple(str(number) for number in range(int(code[0:2]), int(code[-2:]) + 1))
+    return (code,)
+
+
+def get_period_columns(period='a'):
+    """
+    Return {node key: column} of the area tables of a period: the annual averages for 'a', or the
+    quarterly totals of a quarter with the employment of its months as emp1, emp2 and emp3
+    """
+    if period == 'a':
+        return {
+            'est': settings.establishments, 'emp': settings.employment, 'wages': settings.wages
+        }
+    columns = {
+        'est': settings.quarterly_establishments, 'emp': settings.quarterly_employment,
+        'wages': settings.quarterly_wages,
+    }
+    for month, column in enumerate(settings.monthly_employment, 1):
+        columns[f'{settings.employment_abbreviation}{month}'] = column
+    return columns
+
+
+def index_area_data(df, highest_aggregation, columns, ownership_code):
+    """
+    Return the variables and the children codes of every node keyed by (industry code, aggregation),
+    the variables being the columns given as {node key: column}, est, emp and wages first, of the
+    rows of the ownership code
+    """
+    df = df[df['own_code']==ownership_code]
+    nodes = {}
+    for code, aggregation, *values in zip(
+        df['industry_code'].astype(str).values,
+        df['agglvl_code'].values.tolist(),
+        *[df[f'{column}'].values for column in columns.values()],
+    ):
+        nodes.setdefault((code, aggregation), tuple(values))
+    parents = {}
+    for code, aggregation in nodes:
+        for prefix in search_prefixes(code):
+            parents.setdefault((prefix, aggregation), []).append(code)
+    children = {}
+    for code, aggregation in nodes:
+        if aggregation == highest_aggregation:
+            children.setdefault('10', set()).add(code)
+        for end in range(1, len(code) + 1):
+            for parent_code in parents.get((code[:end], aggregation - 1), []):
+                children.setdefault((parent_code, aggregation - 1), set()).add(code)
+    return {
+        'keys': list(columns),
+        'nodes': nodes,
+        'children': {key: sorted(codes) for key, codes in children.items()},
+    }
+
+
+def get_indexed_variables(index, code, aggregation):
+    """
+    Return variables of interest given industry code
+    """
+    return index['nodes'][(code, aggregation)][:3]
+
+
+def get_indexed_node(index, code, aggregation):
+    """
+    Return {node key: value} of all the indexed variables given industry code
+    """
+    return dict(zip(index['keys'], index['nodes'][(code, aggregation)]))
+
+
+def get_indexed_children_codes(index, code, aggregation):
+    """
+    Return a list of children codes
+    """
+    if code == '10':
+        return index['children'].get('10', [])
+    return index['children'].get((code, aggregation), [])
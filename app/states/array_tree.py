@@ -0,0 +1,117 @@
+"""
+NAICS tree stored as parallel NumPy columns
+"""
+import numpy as np
+
+
+class ArrayTree:
+    """
+    Tree with one row per node in breadth-first order, the children of row i being
+    the rows offsets[i] to offsets[i+1]
+    """
+    base_columns = ('est', 'emp', 'wages')
+
+    def __init__(self, ind, columns, parent, offsets, depth):
+        self.ind = ind
+        self.columns = columns
+        self.parent = parent
+        self.offsets = offsets
+        self.depth = depth
+        self._index = None
+
+    @classmethod
+    def from_dict(cls, tree):
+        """
+        Return the array tree of a nested dictionary tree
+        """
+        nodes, parent, depth, offsets = [tree], [-1], [0], []
+        row = 0
+        while row < len(nodes):
+            offsets.append(len(nodes))
+            for child in nodes[row]['children']:
+                nodes.append(child)
+                parent.append(row)
+                depth.append(depth[row] + 1)
+            row += 1
+        offsets.append(len(nodes))
+        columns = {key: np.array([node[key] for node in nodes]) for key in cls.base_columns}
+        extra_keys = []
+        for node in nodes:
+            for key in node:
+                if key not in columns and key not in ('ind', 'children') and key not in extra_keys:
+                    extra_keys.append(key)
+        for key in extra_keys:
+            columns[key] = np.array([node.get(key, np.nan) for node in nodes], dtype=float)
+        return cls(
+            np.array([node['ind'] for node in nodes]),
+            columns,
+            np.array(parent, dtype=np.int32),
+            np.array(offsets, dtype=np.int32),
+            np.array(depth, dtype=np.int8),
+        )
+
+    def __len__(self):
+        return len(self.ind)
+
+    def children(self, row):
+        """
+        Return the rows of the children of a row
+        """
+        return range(self.offsets[row], self.offsets[row + 1])
+
+    @property
+    def index(self):
+        """
+        Return the industry code to row mapping, built on first use
+        """
+        if self._index is None:
+            self._index = {code: row for row, code in enumerate(self.ind.tolist())}
+        return self._index
+
+    def row(self, ind):
+        """
+        Return the row of an industry code or None if the code is not in the tree
+        """
+        return self.index.get(ind)
+
+    def levels(self):
+        """
+        Return the rows of every depth from the root to the leaves
+        """
+        bounds = np.flatnonzero(np.diff(self.depth)) + 1
+        return [range(start, end) for start, end in zip(
+            [0] + bounds.tolist(), bounds.tolist() + [len(self)]
+        )]
+
+    def values(self, key):
+        """
+        Return the disclosed values of a key e.g. 'emp', with the {key}_lp estimates where undisclosed
+        """
+        estimates = self.columns.get(f'{key}_lp')
+        if estimates is None:
+            return self.columns[key].astype(float)
+        return np.where(
+            (self.columns[key] == 0) & ~np.isnan(estimates), estimates, self.columns[key]
+        )
+
+    def node(self, row):
+        """
+        Return the node of a row as a dictionary without children
+        """
+        node = {'ind': str(self.ind[row])}
+        for key in self.base_columns:
+            node[key] = self.columns[key][row]
+        node['children'] = []
+        for key, column in self.columns.items():
+            if key not in self.base_columns and not np.isnan(column[row]):
+                node[key] = column[row]
+        return node
+
+    def to_dict(self):
+        """
+        Return the tree as nested dictionaries
+        """
+        nodes = [self.node(row) for row in range(len(self))]
+        for row, node in enumerate(nodes):
+            node['children'] = [nodes[child] for child in self.children(row)]
+        return nodes[0]
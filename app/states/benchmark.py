@@ -0,0 +1,177 @@
+"""
+Offline benchmarks of the stages of a state run on synthetic area tables
+"""
+import json
+import os
+import subprocess
+import time
+
+import numpy as np
+
+from .constraints import get_sparse_constraints
+from .equations import get_area_constraints, get_state_county_constraints, vectorize_equations
+from .parallel import solve_problem
+from .pipeline import write_solution
+from .snapshot import normalize_area_data
+from .synthetic import generate_state
+from .tree import build_county_tree, build_state_tree, index_tree
+
+from .config import settings
+
+
+def time_stage(repeats, function, *args):
+    """
+    Return the result of the function and the times of its repeated calls
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def normalize_areas(areas):
+    """
+    Return the area tables as the snapshots store them
+    """
+    return {area_code: normalize_area_data(df) for area_code, df in areas.items()}
+
+
+def build_trees(areas):
+    """
+    Return {area: tree} of the area tables of a state, the state first
+    """
+    return {
+        area_code: build_state_tree(df, '10', settings.state_root_aggregation) if i_area == 0
+        else build_county_tree(df, '10', settings.county_root_aggregation)
+        for i_area, (area_code, df) in enumerate(areas.items())
+    }
+
+
+def get_constraints(trees, key):
+    """
+    Return the string equations of all the area trees
+    """
+    constraints = []
+    for code, tree in trees.items():
+        constraints = get_area_constraints(code, tree, key, constraints)
+    return constraints
+
+
+def get_commit():
+    """
+    Return the commit of the working tree, or None outside of git
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    counties=20, suppression=0.3, branching=4, coverage=0.5, seed=0, repeats=3, key='emp'
+):
+    """
+    Return the parameters, the sizes and the times of every stage on a synthetic state
+    """
+    parameters = {
+        'counties': counties, 'suppression': suppression, 'branching': branching,
+        'coverage': coverage, 'seed': seed, 'repeats': repeats, 'key': key,
+        'backend': settings.lp_solver, 'decompose': settings.lp_decompose,
+        'presolve': settings.lp_presolve,
+    }
+    year = 2021
+    raw_areas = generate_state(
+        counties=counties, suppression=suppression, branching=branching, coverage=coverage,
+        year=year, seed=seed
+    )
+    timings = {}
+    areas, timings['parse'] = time_stage(repeats, normalize_areas, raw_areas)
+    trees, timings['build_tree'] = time_stage(repeats, build_trees, areas)
+    state = {year: trees}
+    constraints, timings['get_constraints'] = time_stage(repeats, get_constraints, trees, key)
+    state_county_constraints, timings['get_state_county_constraints'] = time_stage(
+        repeats, get_state_county_constraints, state, year, key
+    )
+    _, timings['vectorize_equations'] = time_stage(
+        repeats, vectorize_equations, constraints + state_county_constraints, key
+    )
+    (A, b, variables), timings['sparse_constraints'] = time_stage(
+        repeats, get_sparse_constraints, state, year, key
+    )
+    (x, report), timings['solve'] = time_stage(
+        repeats, solve_problem, np.ones(len(variables)), A, b, settings.lp_solver,
+        settings.lp_solver_options, settings.lp_decompose, settings.lp_presolve
+    )
+    _, timings['write_back'] = time_stage(repeats, write_solution, trees, key, variables, x)
+    sizes = {
+        'areas': len(trees),
+        'nodes': sum(len(index_tree(tree)) for tree in trees.values()),
+        'constraints': len(constraints) + len(state_county_constraints),
+        'rows': A.shape[0],
+        'variables': len(variables),
+        'nnz': int(A.nnz),
+        'iterations': report['iterations'],
+        'status': report['status'],
+    }
+    return {
+        'commit': get_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': parameters,
+        'sizes': sizes,
+        'timings': {
+            stage: {'min': min(times), 'median': float(np.median(times)), 'times': times}
+            for stage, times in timings.items()
+        },
+    }
+
+
+def load_results(path):
+    """
+    Return the benchmark results recorded in a JSON lines file
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+def save_results(path, results):
+    """
+    Append benchmark results to a JSON lines file
+    """
+    with open(path, 'a') as fp:
+        fp.write(json.dumps(results) + '\n')
+
+
+def print_results(results, previous=None):
+    """
+    Print the times of the stages, next to those of previous results with the same parameters
+    """
+    print(f"commit {results['commit']}: {results['sizes']}")
+    for stage, timing in results['timings'].items():
+        line = f"{stage:<30} min {timing['min']:.4f}s median {timing['median']:.4f}s"
+        if previous is not None and stage in previous['timings']:
+            previous_min = previous['timings'][stage]['min']
+            line += f" | {previous['commit']} min {previous_min:.4f}s"
+            if previous_min > 0:
+                line += f" ({timing['min'] / previous_min:.2f}x)"
+        print(line)
+
+
+def benchmark(path, **parameters):
+    """
+    Run the benchmarks, print them against the last results with the same parameters in path
+    and record them there
+    """
+    results = run_benchmarks(**parameters)
+    previous = [
+        entry for entry in load_results(path) if entry['parameters'] == results['parameters']
+    ]
+    print_results(results, previous[-1] if len(previous) > 0 else None)
+    save_results(path, results)
+    return results
@@ -0,0 +1,129 @@
+"""
+Local on-disk cache for BLS files
+"""
+import hashlib
+import os
+import threading
+import urllib.request
+
+from .files import atomic_path
+from .instrument import timer
+
+from .config import settings
+
+# the running size of the cache and the files used by the current run, which are not evicted
+cache_state = {'size': None, 'used': set()}
+cache_lock = threading.Lock()
+
+
+def cache_key(kind, year, quarter, code):
+    """
+    Return the address of a BLS file given kind (area or industry), year, quarter and code, and
+    the source it is downloaded from
+    """
+    name = f'{settings.qcew_api_url}/{year}/{quarter}/{kind}/{code}'
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def cache_path(key):
+    """
+    Return the path of a cached file given its address
+    """
+    return os.path.join(settings.cache_dir, key[:2], f'{key}.csv')
+
+
+def cached_files():
+    """
+    Return a list of (last access, size, path) of all cached files, least recently used first
+    """
+    files = []
+    if not os.path.isdir(settings.cache_dir):
+        return files
+    for root, _, names in os.walk(settings.cache_dir):
+        for name in names:
+            if name.endswith('.csv'):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+    return sorted(files)
+
+
+def evict(max_bytes):
+    """
+    Remove least recently used files until the cache holds at most max_bytes, keeping the files
+    used by the current run, and return the size of the cache
+    """
+    files = cached_files()
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        if path in cache_state['used']:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def store(kind, year, quarter, code, content):
+    """
+    Write the content of a BLS file into the cache and return its path, evicting least recently
+    used files only once the running size of the cache exceeds its cap, which only the files of
+    the current run can keep it above
+    """
+    path = cache_path(cache_key(kind, year, quarter, code))
+    with cache_lock:
+        if cache_state['size'] is None:
+            cache_state['size'] = sum(size for _, size, _ in cached_files())
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        with atomic_path(path) as temporary_path, open(temporary_path, 'wb') as fp:
+            fp.write(content)
+        cache_state['used'].add(path)
+        cache_state['size'] += len(content) - previous_size
+        if cache_state['size'] > settings.cache_max_bytes:
+            cache_state['size'] = evict(settings.cache_max_bytes)
+    return path
+
+
+def release_used():
+    """
+    Let the files used so far be evicted when a new run starts in a long-lived process, e.g. a
+    job of a scheduler worker, evicting them at once if the cache is above its cap
+    """
+    with cache_lock:
+        cache_state['used'].clear()
+        if cache_state['size'] is not None and cache_state['size'] > settings.cache_max_bytes:
+            cache_state['size'] = evict(settings.cache_max_bytes)
+
+
+def download(url_path):
+    """
+    Return the raw content found at the url
+    """
+    with urllib.request.urlopen(url_path, timeout=settings.download_timeout) as response:
+        return response.read()
+
+
+def fetch_cached(kind, year, quarter, code):
+    """
+    Return the local path of a BLS file, downloading it unless it is already cached
+    """
+    url_path = f'{settings.qcew_api_url}/{year}/{quarter}/{kind}/{code}.csv'
+    path = cache_path(cache_key(kind, year, quarter, code))
+    with cache_lock:
+        cache_state['used'].add(path)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    if settings.cache_offline:
+        raise FileNotFoundError(f'{url_path} is not in the cache at {settings.cache_dir}')
+    with timer('fetch', year, code) as counts:
+        content = download(url_path)
+        counts['bytes'] = len(content)
+    return store(kind, year, quarter, code, content)
@@ -0,0 +1,85 @@
+"""
+Checkpoints of the stages of a run, keyed by the hash of their inputs
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+from .files import atomic_path
+from .shards import NpEncoder
+
+
+def hash_content(*parts):
+    """
+    Return the hash of JSON serializable parts, data frames and bytes
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(json.dumps([str(column) for column in part.columns]).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        elif isinstance(part, bytes):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, sort_keys=True, cls=NpEncoder).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def checkpoint_path(root, stage, key):
+    """
+    Return the path of the checkpoint of a stage given the hash of its inputs
+    """
+    return os.path.join(root, stage, key[:2], f'{key}.pkl')
+
+
+def load_checkpoint(root, stage, key):
+    """
+    Return the checkpointed result of a stage or None if there is none for these inputs
+    """
+    path = checkpoint_path(root, stage, key)
+    try:
+        with open(path, 'rb') as fp:
+            result = pickle.load(fp)
+    except FileNotFoundError:
+        return None
+    os.utime(path)
+    return result
+
+
+def save_checkpoint(root, stage, key, result):
+    """
+    Store the result of a stage under the hash of its inputs
+    """
+    path = checkpoint_path(root, stage, key)
+    with atomic_path(path) as temporary_path, open(temporary_path, 'wb') as fp:
+        pickle.dump(result, fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def prune_checkpoints(root, max_bytes):
+    """
+    Remove the least recently used checkpoints until they take at most max_bytes and return
+    their size
+    """
+    files = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith('.pkl'):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        total -= size
+    return total
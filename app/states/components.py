@@ -0,0 +1,62 @@
+"""
+Decomposition of an LP into the connected components of its variables
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+def get_components(A):
+    """
+    Return the component of every variable, variables being connected when they share a row of A
+    """
+    m, n = A.shape
+    pattern = sparse.csr_matrix(A, dtype=bool)
+    graph = sparse.bmat([[None, pattern], [pattern.T, None]], format='csr')
+    _, labels = connected_components(graph, directed=False)
+    _, components = np.unique(labels[m:], return_inverse=True)
+    return components
+
+
+def group_components(components, min_variables=500):
+    """
+    Return the columns of groups of components, largest first, small components being put
+    together until a group has at least min_variables variables
+    """
+    sizes = np.bincount(components)
+    order = np.argsort(-sizes, kind='stable')
+    columns = np.argsort(components, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    groups, group = [], []
+    size = 0
+    for component in order:
+        group.append(columns[starts[component]:starts[component + 1]])
+        size += sizes[component]
+        if size >= min_variables:
+            groups.append(np.sort(np.concatenate(group)))
+            group, size = [], 0
+    if len(group) > 0:
+        groups.append(np.sort(np.concatenate(group)))
+    return groups
+
+
+def split_problem(c, A, b, min_variables=500):
+    """
+    Return the subproblems (columns, c, A, b) of the groups of connected components of
+    min c x subject to A x <= b, x >= 0
+    """
+    A = sparse.csr_matrix(A)
+    groups = group_components(get_components(A), min_variables)
+    group_of_column = np.full(A.shape[1], -1)
+    for k, columns in enumerate(groups):
+        group_of_column[columns] = k
+    # every row belongs to the group of its first variable
+    nonempty = np.flatnonzero(np.diff(A.indptr) > 0)
+    row_groups = group_of_column[A.indices[A.indptr[nonempty]]]
+    order = np.argsort(row_groups, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(np.bincount(row_groups, minlength=len(groups)))])
+    subproblems = []
+    for k, columns in enumerate(groups):
+        rows = nonempty[order[starts[k]:starts[k + 1]]]
+        subproblems.append((columns, c[columns], A[rows][:, columns], b[rows]))
+    return subproblems
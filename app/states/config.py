@@ -1,12 +1,50 @@
 """
 Set configuration
 """
+import os
+
 from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
     qcew_api_url = 'http://data.bls.gov/cew/data/api'
 
+    cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'qcew')
+    cache_max_bytes = 2 * 1024**3
+    cache_offline = False
+
+    download_workers = 8
+    download_retries = 3
+    download_backoff = 1.0
+    download_timeout = 60.0
+
+    snapshot_dir = os.path.join(os.path.expanduser('~'), '.cache', 'qcew', 'snapshots')
+    snapshot_columns = [
+        'annual_avg_estabs', 'annual_avg_emplvl', 'total_annual_wages',
+        'qtrly_estabs', 'month1_emplvl', 'month2_emplvl', 'month3_emplvl', 'total_qtrly_wages'
+    ]
+
+    shard_dir = os.path.join(os.getcwd(), 'state_shards')
+    checkpoint_dir = os.path.join(os.getcwd(), 'checkpoints')
+    checkpoint = False
+    checkpoint_max_bytes = 1024**3
+    dump_constraints = False
+    report_path = os.path.join(os.getcwd(), 'run_report.json')
+    time_series_partitioned = False
+
+    lp_solver = 'ecos'
+    lp_solver_options = {}
+    lp_workers = 1
+    lp_decompose = True
+    lp_presolve = True
+    lp_incremental = False
+    lp_batch_measures = True
+
+    scheduler_workers = 4
+    scheduler_memory_budget = 8 * 1024**3
+    scheduler_area_bytes = 16 * 1024**2
+    scheduler_log_dir = os.path.join(os.getcwd(), 'logs')
+
     ownership_code = 5
 
     county_root_aggregation = 71
@@ -24,6 +62,11 @@ class Settings(BaseSettings):
     employment = 'annual_avg_emplvl' #'month3_emplvl'
     wages = 'total_annual_wages' #'total_qtrly_wages'
 
+    quarterly_establishments = 'qtrly_estabs'
+    quarterly_employment = 'month3_emplvl'
+    quarterly_wages = 'total_qtrly_wages'
+    monthly_employment = ['month1_emplvl', 'month2_emplvl', 'month3_emplvl']
+
     employment_abbreviation = 'emp'
     wages_abbreviation = 'wages'
 
@@ -0,0 +1,99 @@
+"""
+Sparse constraint matrices assembled straight from the trees
+"""
+import numpy as np
+from scipy import sparse
+
+from .tree import index_tree
+
+
+def split_measure(measure):
+    """
+    Return the key of a measure and whether its LP is weighted by establishments, e.g.
+    ('emp', True) for 'emp_est'
+    """
+    if measure.endswith('_est'):
+        return measure[:-len('_est')], True
+    return measure, False
+
+
+def get_structure(trees, keys=('est', 'emp', 'wages')):
+    """
+    Return the terms of the rows parent = sum of children of all the areas followed by the rows
+    state = sum of counties, in the order of get_constraints and get_state_county_constraints:
+    the row, the coefficient and the node name of every term and the values of the node for
+    every key
+    """
+    term_rows, coefficients, names, term_nodes = [], [], [], []
+
+    def add_term(row, coefficient, code, node):
+        term_rows.append(row)
+        coefficients.append(coefficient)
+        names.append(f"{code}_{node['ind']}")
+        term_nodes.append(node)
+
+    rows = 0
+    nodes = [(code, tree) for code, tree in reversed(list(trees.items()))]
+    while len(nodes) > 0:
+        code, node = nodes.pop()
+        if len(node['children'])>0:
+            add_term(rows, 1, code, node)
+            for child in node['children']:
+                add_term(rows, -1, code, child)
+            rows += 1
+        nodes += [(code, child) for child in reversed(node['children'])]
+    state_code = list(trees.keys())[0]
+    county_codes = list(trees.keys())[1:]
+    indexes = {code: index_tree(trees[code]) for code in county_codes}
+    for state_ind, state_node in index_tree(trees[state_code]).items():
+        add_term(rows, 1, state_code, state_node)
+        for county_code in county_codes:
+            county_node = indexes[county_code].get(state_ind)
+            if county_node is not None:
+                add_term(rows, -1, county_code, county_node)
+        rows += 1
+    return {
+        'rows': np.array(term_rows, dtype=np.int64),
+        'coefficients': np.array(coefficients, dtype=float),
+        'names': np.array(names),
+        'values': {
+            key: np.array([node[key] for node in term_nodes], dtype=float) for key in keys
+        },
+    }
+
+
+def get_structure_constraints(structure, key):
+    """
+    Return the sparse matrix A, the constant vector b, the sorted variables and their
+    establishments of the rows of a structure with at least one undisclosed term of key
+    """
+    values = structure['values'][key]
+    unknown = values == 0
+    term_rows = structure['rows']
+    kept_rows = np.unique(term_rows[unknown])
+    constants = -np.bincount(
+        term_rows[~unknown], weights=(structure['coefficients'] * values)[~unknown],
+        minlength=term_rows.max(initial=-1) + 1
+    )
+    names, columns = np.unique(structure['names'][unknown], return_inverse=True)
+    A = sparse.coo_matrix(
+        (
+            structure['coefficients'][unknown],
+            (np.searchsorted(kept_rows, term_rows[unknown]), columns.ravel())
+        ),
+        shape=(len(kept_rows), len(names))
+    ).tocsr()
+    establishments = np.zeros(len(names))
+    establishments[columns.ravel()] = structure['values']['est'][unknown]
+    return A, constants[kept_rows], [f'{key}_{name}' for name in names], establishments
+
+
+def get_sparse_constraints(state, year, key):
+    """
+    Return the sparse matrix A, the constant vector b and the variables of all the area and
+    state-county constraints of a year, in the order of get_constraints and
+    get_state_county_constraints
+    """
+    structure = get_structure(state[year], ['est'] + [key] * (key != 'est'))
+    A, b, variables, _ = get_structure_constraints(structure, key)
+    return A, b, variables
@@ -0,0 +1,56 @@
+"""
+Concurrent download of all the area files of a state
+"""
+import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cache import fetch_cached
+from .config import settings
+from .snapshot import load_area_data
+
+
+def with_retries(function, *args):
+    """
+    Return the result of the function, retrying with exponential backoff on network errors
+    """
+    for attempt in range(settings.download_retries + 1):
+        try:
+            return function(*args)
+        except urllib.error.HTTPError as error:
+            if error.code == 404 or attempt == settings.download_retries:
+                raise
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            if attempt == settings.download_retries:
+                raise
+        time.sleep(settings.download_backoff * 2**attempt)
+    return None
+
+
+def state_area_codes(state_code, year, quarter):
+    """
+    Return the state area code followed by its county codes, as listed in the industry 102 file
+    """
+    df = pd.read_csv(with_retries(fetch_cached, 'industry', year, quarter, '102'))
+    df = df[df['area_fips'].astype(str).str.startswith(state_code)]
+    return list(np.unique(df['area_fips'].astype(str)))
+
+
+def fetch_state_areas(state_code, years, quarters, workers=None, area_codes=None):
+    """
+    Return the area codes of a state, unless given listed from the industry 102 file, and the
+    dictionary of its area tables keyed by (year, quarter, area code), the area file of every
+    year and quarter being downloaded once in a bounded pool of threads
+    """
+    if area_codes is None:
+        area_codes = state_area_codes(state_code, max(years), quarters[0])
+    jobs = [
+        (year, quarter, area_code)
+        for year in years for quarter in quarters for area_code in area_codes
+    ]
+    with ThreadPoolExecutor(max_workers=workers or settings.download_workers) as executor:
+        futures = {job: executor.submit(with_retries, load_area_data, *job) for job in jobs}
+        return area_codes, {job: future.result()[0] for job, future in futures.items()}
@@ -0,0 +1,118 @@
+"""
+String equations of the state LP and their vectorization
+"""
+import re
+
+import numpy as np
+from scipy import sparse
+
+from .tree import fetch_values_given_key, index_tree
+
+
+def get_area_constraints(tree_code, tree, key, constraints):
+    """
+    Return all the constraints in a tree
+    """
+    if len(tree['children'])>0:
+        if tree[key] == 0:
+            constraint = f"{key}_{tree_code}_{tree['ind']} = "
+        else:
+            constraint = f"{tree[key]} = "
+        for i,child in enumerate(tree['children']):
+            if i > 0:
+                constraint += ' + '
+            if child[key] == 0:
+                constraint+= f"{key}_{tree_code}_{child['ind']} "
+            else:
+                constraint+= f"{child[key]}"
+        if key in constraint:
+            check = constraint.split(' = ')
+            if check[0] != check[1]:
+                constraints.append(re.sub(r'\s+', ' ', constraint))
+    for child in tree['children']:
+        constraints = get_area_constraints(tree_code, child, key, constraints)
+    return constraints
+
+
+def get_state_county_constraints(state, year, key):
+    """
+    Return all the constraints state = sum of counties
+    """
+    state_county_constraints = []
+    state_code = list(state[year].keys())[0]
+    county_codes = list(state[year].keys())[1:]
+    indexes = {code: index_tree(tree) for code, tree in state[year].items()}
+    state_inds = fetch_values_given_key(state[year][state_code], 'ind', [])
+    for state_ind in state_inds:
+        state_node = indexes[state_code][state_ind]
+        if state_node[key] == 0:
+            state_county_constraint = f"{key}_{state_code}_{state_ind} = "
+        else:
+            state_county_constraint = f"{state_node[key]} = "
+        for county_code in county_codes:
+            county_node = indexes[county_code].get(state_ind)
+            if county_node is not None:
+                if county_node[key] == 0:
+                    state_county_constraint += f" + {key}_{county_code}_{state_ind}"
+                else:
+                    state_county_constraint += f" + {county_node[key]}"
+        if f'{key}_' in state_county_constraint:
+            state_county_constraints.append(
+                re.sub(r'\s+', ' ', state_county_constraint.replace('=  + ','= '))
+            )
+    return state_county_constraints
+
+
+def get_state_constraints(state, year, key):
+    """
+    Return the constraints of all the areas of a year followed by the state = sum of counties ones
+    """
+    constraints = []
+    for code, tree in state[year].items():
+        constraints = get_area_constraints(code, tree, key, constraints)
+    return constraints + get_state_county_constraints(state, year, key)
+
+
+def get_array_elements(columns, equation, key, row, constant):
+    """
+    Return the nonzero coefficients of an equation keyed by column, and its constant
+    """
+    terms = re.findall(fr'({key}_[^ ]*|[+-]?\d+)', equation)
+    positions = [
+        m.start(0) for m in re.finditer(fr'({key}_[^ ]*|[+-]?\d+)', equation)
+    ]
+    for term,position in zip(terms, positions):
+        if f'{key}_' in term:
+            if position < equation.find('='):
+                row[columns[term]] = 1
+            else:
+                row[columns[term]] = -1
+        else:
+            if position < equation.find('='):
+                constant -= int(term)
+            else:
+                constant += int(term)
+    return row, constant
+
+
+def vectorize_equations(equations, key):
+    """
+    Vectorize a list of string equations and return the sparse matrix A and the constant vector b.
+    """
+    variables = set()
+    for equation in equations:
+        for var in re.findall(fr"{key}_[^ ]*", equation):
+            variables.add(var)
+    variables = sorted(list(variables))
+    columns = {variable: j for j, variable in enumerate(variables)}
+    N = len(variables)
+    M = len(equations)
+    row_indices, column_indices, coefficients = [], [], []
+    b = np.zeros(M)
+    for i,equation in enumerate(equations):
+        row, b[i] = get_array_elements(columns, equation, key, {}, 0)
+        row_indices += [i] * len(row)
+        column_indices += list(row.keys())
+        coefficients += list(row.values())
+    A = sparse.csr_matrix((coefficients, (row_indices, column_indices)), shape=(M, N))
+    return A, b, variables
@@ -0,0 +1,22 @@
+"""
+Files written atomically, so that concurrent readers never see them partly written
+"""
+import contextlib
+import os
+import threading
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary path next to the path, its directory created, and move the temporary file
+    to the path once written, removing it if writing fails
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        yield temporary_path
+        os.replace(temporary_path, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary_path)
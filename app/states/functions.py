@@ -1,10 +1,10 @@
 """
 Functions for state level optimization
 """
-import cvxpy as cp
-
-from helpers import get_optimization_variables
-from tree import write_into, get_objective, get_constraints, fetch_branch
+from .helpers import get_optimization_variables
+from .lp import set_linear_programming, solve_linear_programming
+from .tree import get_objective, get_constraints, index_tree
+from .config import settings
 
 
 def set_optimization_problem(county, key):
@@ -21,26 +21,16 @@ def run_linear_programming(county, key):
     """
     Return the given tree with linear programming results in it
     """
-    objective_function, variables, constraints = set_optimization_problem(county, key)
-    for variable in variables:
-        exec(f"{variable} = cp.Variable()", globals())
-    numerical_constraints = []
-    for i,constraint in enumerate(constraints):
-        if i > 0:
-            numerical_constraints.append(eval(f"{constraint.replace('=','==')}"))
-    for variable in variables:
-        numerical_constraints.append(eval(f"{variable}>= 0"))
-    exec(f"objective = cp.Minimize(cp.abs({objective_function}))")
-    problem = cp.Problem(locals()['objective'], numerical_constraints)
-    problem.solve(solver=cp.ECOS)
-    for variable in variables:
-        ind = variable[variable.find('_')+1:-1]
-        branch = fetch_branch(county, 'ind', ind)
-        if branch[key] == 0:
-            write_into(
-                county, 'ind', branch['ind'],
-                {f'{key}_lp': branch['est'] * eval(f"float({variable}.value)")}
-            )
+    c, d, A, b, variables = set_linear_programming(county, key)
+    if len(variables) > 0:
+        x, _ = solve_linear_programming(
+            c, d, A, b, backend=settings.lp_solver, presolve=settings.lp_presolve
+        )
+        nodes = index_tree(county)
+        for ind, x_j in zip(variables, x):
+            branch = nodes[ind]
+            if branch[key] == 0:
+                branch[f'{key}_lp'] = branch['est'] * float(x_j)
     return county
 
 
@@ -48,8 +38,9 @@ def save_data_to_time_series(time_series, county, industry_codes, key, year):
     """
     Returns time series that contains all the industries across time
     """
+    nodes = index_tree(county)
     for ind in industry_codes:
-        industry = fetch_branch(county, 'ind', ind)
+        industry = nodes.get(ind)
         if industry is not None:
             if industry.get(f'{key}_lp') is not None:
                 time_series.at[year, ind] = industry[f'{key}_lp']
@@ -6,7 +6,8 @@ import re
 import numpy as np
 import pandas as pd
 
-from config import settings
+from .cache import fetch_cached
+from .config import settings
 
 
 def fetch_area_data(year, quarter, area):
@@ -14,7 +15,7 @@ def fetch_area_data(year, quarter, area):
     Return a pandas table from BLS given year, quarter (a for year), and area code
     """
     url_path = f'{settings.qcew_api_url}/{year}/{quarter}/area/{area}.csv'
-    df = pd.read_csv(url_path)
+    df = pd.read_csv(fetch_cached('area', year, quarter, area))
     df['industry_code'] = df['industry_code'].str.replace(
         '-',
         settings.string_connecting_codes
@@ -27,7 +28,7 @@ def fetch_industry_data(year, quarter, industry):
     Return a pandas table from BLS given year, quarter (a for year), and NAICS code
     """
     url_path = f'{settings.qcew_api_url}/{year}/{quarter}/industry/{industry}.csv'
-    return pd.read_csv(url_path), url_path
+    return pd.read_csv(fetch_cached('industry', year, quarter, industry)), url_path
 
 
 def county_aggregation(aggregation):
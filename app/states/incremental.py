@@ -0,0 +1,153 @@
+"""
+Incremental re-solve of the yearly LPs of a state, warm-started from the previous year
+"""
+import time
+
+import numpy as np
+from scipy import sparse
+
+from .parallel import build_year, get_sizes
+from .solvers import get_osqp_settings, get_report, solve_lp
+
+# the backends whose problem can be updated and warm-started between solves
+warm_start_backends = ('osqp', 'cvxpy')
+# largest violation of the constraints accepted from a warm-started solve, relative to the
+# largest constant
+feasibility_tolerance = 1e-6
+
+
+class IncrementalLP:
+    """
+    LP min sum x subject to A x <= b, x >= 0 kept between solves: when the variables and A
+    are those of the previous solve only b is updated, and the solver starts from a given x
+    """
+
+    def __init__(self, backend, options):
+        if backend not in warm_start_backends:
+            raise Exception(
+                f'The incremental mode warm-starts {" or ".join(warm_start_backends)}, not '
+                f'{backend}: set LP_SOLVER to one of them or LP_INCREMENTAL=false.'
+            )
+        self.backend = backend
+        self.options = options
+        self.variables = None
+        self.A = None
+        self.solver = None
+        self.x = None
+        self.b = None
+
+    def same_structure(self, A, variables):
+        """
+        Return whether the variables and the constraint matrix are those of the previous solve
+        """
+        return (
+            self.variables == variables
+            and self.A.shape == A.shape
+            and (self.A != A).nnz == 0
+        )
+
+    def setup(self, A, b, variables):
+        """
+        Build the problem of the solver from scratch
+        """
+        n = len(variables)
+        if self.backend == 'osqp':
+            import osqp # pylint: disable=import-outside-toplevel
+            self.solver = osqp.OSQP()
+            self.solver.setup(
+                sparse.csc_matrix((n, n)), np.ones(n),
+                sparse.vstack([A, sparse.identity(n)], format='csc'),
+                np.concatenate([np.full(A.shape[0], -np.inf), np.zeros(n)]),
+                np.concatenate([b, np.full(n, np.inf)]),
+                **get_osqp_settings(self.options, warm_start=True)
+            )
+        elif self.backend == 'cvxpy':
+            import cvxpy as cp # pylint: disable=import-outside-toplevel
+            self.x = cp.Variable(n)
+            self.b = cp.Parameter(A.shape[0])
+            self.solver = cp.Problem(
+                cp.Minimize(cp.sum(self.x)), [A.tocsc() @ self.x <= self.b, self.x >= 0]
+            )
+        self.variables = variables
+        self.A = A
+
+    def solve(self, A, b, variables, x0):
+        """
+        Return the solution and the report of the LP, reusing the previous problem when its
+        structure is unchanged and starting from x0. A problem without constraints or variables
+        is solved by zeros, and an inaccurate or infeasible warm-started solution is replaced by
+        the one of a cold solve
+        """
+        if A.shape[0] == 0 or len(variables) == 0:
+            report = get_report(self.backend, 'empty', 0.0, 0.0, 0)
+            report.update({'rebuilt': False, 'warm_start': False})
+            return np.zeros(len(variables)), report
+        start = time.perf_counter()
+        rebuilt = self.variables is None or not self.same_structure(A, variables)
+        if rebuilt:
+            self.setup(A, b, variables)
+        if self.backend == 'osqp':
+            if not rebuilt:
+                self.solver.update(u=np.concatenate([b, np.full(len(variables), np.inf)]))
+            self.solver.warm_start(x=x0)
+            build_time = time.perf_counter() - start
+            result = self.solver.solve()
+            x = result.x if result.info.status_val == 1 else None
+            report = get_report(
+                'osqp', result.info.status, build_time,
+                result.info.setup_time + result.info.solve_time, int(result.info.iter)
+            )
+        else:
+            options = {'solver': 'SCS', **self.options}
+            self.b.value = b
+            self.x.value = x0
+            self.solver.solve(warm_start=True, **options)
+            stats = self.solver.solver_stats
+            solve_time = stats.solve_time if stats.solve_time is not None else 0.0
+            x = self.x.value if self.solver.status == 'optimal' else None
+            report = get_report(
+                f"cvxpy/{options['solver']}", self.solver.status,
+                time.perf_counter() - start - solve_time, solve_time, stats.num_iters
+            )
+        if x is None or not is_feasible(A, b, x):
+            x, report = solve_lp(np.ones(len(variables)), A, b, backend=self.backend)
+            report.update({'rebuilt': rebuilt, 'warm_start': False})
+            return x, report
+        report.update({'rebuilt': rebuilt, 'warm_start': True})
+        return np.asarray(x), report
+
+
+def is_feasible(A, b, x):
+    """
+    Return whether x satisfies A x <= b and x >= 0 up to the tolerance
+    """
+    violation = max(np.max(A @ x - b, initial=0), np.max(-x, initial=0))
+    return violation <= feasibility_tolerance * max(np.max(np.abs(b), initial=0), 1.0)
+
+
+def get_warm_start(variables, solution):
+    """
+    Return the starting point of the variables from a previous {variable: value} solution,
+    zero for the variables it does not have
+    """
+    return np.array([solution.get(variable, 0.0) for variable in variables])
+
+
+def solve_years_incrementally(state, years, key, backend, options, callback=None):
+    """
+    Return {year: (variables, x, report)} solving the years in order, each one warm-started
+    from the solution of the year before, calling callback(year, solution) after each year
+    """
+    lp = IncrementalLP(backend, options)
+    solutions = {}
+    previous = {}
+    for year in years:
+        _, A, b, variables, build_time = build_year(state[year], year, key)
+        x, report = lp.solve(A, b, variables, get_warm_start(variables, previous))
+        report['build_time'] += build_time
+        report.update(get_sizes(A, variables))
+        solutions[year] = (variables, x, report)
+        if callback is not None:
+            callback(year, solutions[year])
+        previous = dict(zip(variables, x))
+    return solutions
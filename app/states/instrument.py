@@ -0,0 +1,87 @@
+"""
+Timers and counters of the stages of a run, written as a machine-readable run report
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .shards import NpEncoder
+
+# the records of the run, appended from the download threads as well
+records = []
+records_lock = threading.Lock()
+
+
+def reset():
+    """
+    Forget the records of a previous run
+    """
+    with records_lock:
+        records.clear()
+
+
+def record(stage, year=None, area=None, seconds=0.0, **counts):
+    """
+    Record the time and the counts of a stage of a (year, area), e.g. those of a solve report
+    """
+    with records_lock:
+        records.append({
+            'stage': stage, 'year': year, 'area': area, 'time': seconds, 'counts': counts
+        })
+
+
+@contextmanager
+def timer(stage, year=None, area=None, **counts):
+    """
+    Record the time spent in the block as a stage of a (year, area), with the counts given here
+    or set in the yielded dictionary
+    """
+    start = time.perf_counter()
+    try:
+        yield counts
+    finally:
+        record(stage, year, area, time.perf_counter() - start, **counts)
+
+
+def summarize(run_records):
+    """
+    Return {stage: calls, total time and summed numeric counts} of records
+    """
+    summary = {}
+    for entry in run_records:
+        stage = summary.setdefault(entry['stage'], {'calls': 0, 'time': 0.0, 'counts': {}})
+        stage['calls'] += 1
+        stage['time'] += entry['time']
+        for name, value in entry['counts'].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                stage['counts'][name] = stage['counts'].get(name, 0) + value
+    return summary
+
+
+def write_report(path, **metadata):
+    """
+    Write the summary and the records of the run as JSON, and return the summary
+    """
+    with records_lock:
+        run_records = list(records)
+    summary = summarize(run_records)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as fp:
+        json.dump(
+            {'metadata': metadata, 'summary': summary, 'records': run_records}, fp,
+            cls=NpEncoder, indent=1
+        )
+    return summary
+
+
+def print_summary(summary):
+    """
+    Print the total time, the calls and the counts of every stage
+    """
+    for stage, entry in summary.items():
+        counts = ', '.join(f'{name} {value}' for name, value in entry['counts'].items())
+        print(f"{stage:<12} {entry['time']:9.3f}s {entry['calls']:6d} calls  {counts}")
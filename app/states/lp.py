@@ -0,0 +1,108 @@
+"""
+Matrix form of the linear programming of an area with variables per establishment
+"""
+import numpy as np
+from scipy import sparse
+
+from .presolve import presolve_lp
+from .solvers import solve_lp
+
+
+def get_establishment_rows(tree, key, rows):
+    """
+    Return rows (terms, constant) of the constraints in a tree, terms being (ind, est) of
+    undisclosed parents and -(ind, est) of undisclosed children
+    """
+    if len(tree['children'])>0:
+        terms = []
+        constant = 0
+        if tree[key] == 0:
+            terms.append((tree['ind'], tree['est']))
+        else:
+            constant -= tree[key]
+        for child in tree['children']:
+            if child[key] == 0:
+                terms.append((child['ind'], -child['est']))
+            else:
+                constant += child[key]
+        if len(terms) > 0 or len(tree['children']) > 1 or constant != 0:
+            rows.append((terms, constant))
+    for child in tree['children']:
+        rows = get_establishment_rows(child, key, rows)
+    return rows
+
+
+def get_objective_terms(tree, key, terms, constant):
+    """
+    Return terms and constant of the objective key_10 - sum (key_6digits)
+    """
+    if len(tree['children'])==0:
+        if tree[key] == 0:
+            terms.append((tree['ind'], -tree['est']))
+        else:
+            constant -= tree[key]
+    for child in tree['children']:
+        terms, constant = get_objective_terms(child, key, terms, constant)
+    return terms, constant
+
+
+def set_linear_programming(county, key):
+    """
+    Return c, d, A, b and the industry codes of x for min |c x + d| subject to A x = b, x >= 0
+    """
+    rows = get_establishment_rows(county, key, [])
+    objective_terms, d = get_objective_terms(county, key, [], county[key])
+    variables = sorted(
+        {ind for terms, _ in rows for ind, _ in terms} | {ind for ind, _ in objective_terms}
+    )
+    columns = {ind: j for j, ind in enumerate(variables)}
+    c = np.zeros(len(variables))
+    for ind, coefficient in objective_terms:
+        c[columns[ind]] += coefficient
+    # the first constraint (the root) is left to the objective
+    row_indices, column_indices, coefficients, b = [], [], [], []
+    for terms, constant in rows[1:]:
+        if len(terms) == 0:
+            if constant != 0 and len(variables) > 0:
+                raise Exception('Disclosed values do not add up: the problem is infeasible.')
+            continue
+        for ind, coefficient in terms:
+            row_indices.append(len(b))
+            column_indices.append(columns[ind])
+            coefficients.append(coefficient)
+        b.append(constant)
+    A = sparse.csr_matrix(
+        (np.array(coefficients, dtype=float), (row_indices, column_indices)),
+        shape=(len(b), len(variables))
+    )
+    return c, float(d), A, np.array(b, dtype=float), variables
+
+
+def solve_linear_programming(c, d, A, b, backend='ecos', presolve=True, **options):
+    """
+    Return the solution x of min |c x + d| subject to A x = b, x >= 0 and the solver report,
+    solving min t subject to c x - t <= -d, -c x - t <= d over (x, t) after the presolve
+    """
+    if presolve:
+        columns, x, A_ub, b_ub, A, b, variables, rows = presolve_lp(len(c), A_eq=A, b_eq=b)
+        d += c @ x
+        c = c[columns]
+    else:
+        columns, x = np.arange(len(c)), np.zeros(len(c))
+        A_ub, b_ub = sparse.csr_matrix((0, len(c))), np.zeros(0)
+        variables, rows = 0, 0
+    n = len(c)
+    A_ub = sparse.bmat([
+        [sparse.csr_matrix(c.reshape(1, n)), sparse.csr_matrix([[-1.0]])],
+        [sparse.csr_matrix(-c.reshape(1, n)), sparse.csr_matrix([[-1.0]])],
+        [A_ub, sparse.csr_matrix((A_ub.shape[0], 1))],
+    ], format='csr')
+    A_eq = sparse.hstack([A, sparse.csr_matrix((A.shape[0], 1))], format='csr')
+    objective = np.zeros(n + 1)
+    objective[n] = 1
+    solution, report = solve_lp(
+        objective, A_ub, np.concatenate([[-d, d], b_ub]), A_eq, b, backend=backend, **options
+    )
+    x[columns] += solution[:n]
+    report.update({'presolved_variables': variables, 'presolved_rows': rows})
+    return x, report
@@ -0,0 +1,193 @@
+"""
+Checks of the estimated trees of a state and their time series
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .array_tree import ArrayTree
+
+from .config import settings
+
+
+def is_state_area(area_code):
+    """
+    Return whether an area code is the one of a whole state, its FIPS code followed by 000
+    """
+    return str(area_code).endswith('000')
+
+
+def flatten_state(state, years, key):
+    """
+    Return the nodes of all the trees of a state as parallel arrays, each tree in the breadth-first
+    order of its ArrayTree: the year (position in years), the tree, the area code, whether the area
+    is the state, the industry code, the row of the parent (-1 for roots) and the estimated value
+    of the key
+    """
+    dtypes = {
+        'year': np.int64, 'tree': np.int64, 'area': str, 'state': bool, 'ind': str,
+        'parent': np.int64, 'value': float,
+    }
+    columns = {column: [] for column in dtypes}
+    rows = 0
+    for i_year, year in enumerate(years):
+        for code, tree in state[year].items():
+            array_tree = ArrayTree.from_dict(tree)
+            size = len(array_tree)
+            columns['year'].append(np.full(size, i_year))
+            columns['tree'].append(np.full(size, len(columns['ind'])))
+            columns['area'].append(np.full(size, code))
+            columns['state'].append(np.full(size, is_state_area(code)))
+            columns['ind'].append(array_tree.ind)
+            columns['parent'].append(np.where(array_tree.parent >= 0, array_tree.parent + rows, -1))
+            columns['value'].append(array_tree.values(key))
+            rows += size
+    return {
+        column: np.concatenate(parts).astype(dtypes[column]) if len(parts) > 0
+        else np.zeros(0, dtype=dtypes[column])
+        for column, parts in columns.items()
+    }
+
+
+def get_first_nodes(nodes, inds, codes):
+    """
+    Return the mask of the first node of every industry code in every tree, the node index_tree
+    keeps, given the positions of the industry codes of the nodes among codes
+    """
+    first = np.zeros(len(inds), dtype=bool)
+    first[np.unique(nodes['tree'] * len(codes) + inds, return_index=True)[1]] = True
+    return first
+
+
+def get_area_discrepancies(nodes):
+    """
+    Return the rows of the parent nodes of flattened trees and the sums of their children
+    """
+    children = np.flatnonzero(nodes['parent'] >= 0)
+    parents = nodes['parent'][children]
+    sums = np.bincount(parents, weights=nodes['value'][children], minlength=len(nodes['parent']))
+    rows = np.unique(parents)
+    return rows, sums[rows]
+
+
+def get_state_county_differences(state, years, key, nodes=None):
+    """
+    Return the absolute differences state minus sum of counties by industry and year, 0 where
+    the state value is 0
+    """
+    if nodes is None:
+        nodes = flatten_state(state, years, key)
+    codes, inds = np.unique(nodes['ind'], return_inverse=True)
+    inds = inds.ravel()
+    first = get_first_nodes(nodes, inds, codes)
+    cells = nodes['year'] * len(codes) + inds
+    counties = first & ~nodes['state']
+    counties_sums = np.bincount(
+        cells[counties], weights=nodes['value'][counties], minlength=len(years) * len(codes)
+    )
+    state_rows = np.flatnonzero(first & nodes['state'])
+    state_values = nodes['value'][state_rows]
+    differences = np.zeros(len(years) * len(codes))
+    differences[cells[state_rows]] = np.where(
+        state_values == 0, 0, np.abs(state_values - counties_sums[cells[state_rows]])
+    )
+    state_codes = np.unique(inds[nodes['state']])
+    return pd.DataFrame(
+        differences.reshape(len(years), len(codes))[:, state_codes].transpose(),
+        index=codes[state_codes].tolist(), columns=years
+    )
+
+
+def print_summary(differences):
+    """
+    Print the mean, median, min and max of a series of discrepancies, or of every column of a table
+    """
+    print('*** discrepancies area totals minus children totals ***')
+    print(f'mean {differences.mean()}')
+    print(f'median {differences.median()}')
+    print(f'min {differences.min()}')
+    print(f'max {differences.max()}')
+
+
+def get_measure_name(key):
+    """
+    Return the name of a measure in output files, employment for emp
+    """
+    return 'employment' if key == 'emp' else key
+
+
+def get_time_series(nodes, years):
+    """
+    Return the long table area, ind, year, value of the first node of every industry code in every
+    flattened tree, values below 0.1 set to 0
+    """
+    codes, inds = np.unique(nodes['ind'], return_inverse=True)
+    first = get_first_nodes(nodes, inds.ravel(), codes)
+    values = nodes['value'][first]
+    return pd.DataFrame({
+        'area': nodes['area'][first],
+        'ind': nodes['ind'][first],
+        'year': np.array(years)[nodes['year'][first]],
+        'value': np.where(values < 1e-1, 0.0, values),
+    })
+
+
+def save_time_series(state, years, key, name, nodes=None, partitioned=None):
+    """
+    Write the time series of every area as {name}_{area}_employment.csv (or _wages), industries
+    by years, or all of them as the Parquet dataset {name}_employment partitioned by area into
+    partition=area_{area} directories, the area codes staying strings in the area column
+    """
+    if nodes is None:
+        nodes = flatten_state(state, years, key)
+    if partitioned is None:
+        partitioned = settings.time_series_partitioned
+    time_series = get_time_series(nodes, years)
+    measure = get_measure_name(key)
+    if partitioned:
+        path = f'{name}_{measure}'
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        # a numeric partition value would be read back as an integer, losing leading zeros
+        time_series['partition'] = 'area_' + time_series['area']
+        time_series.to_parquet(path, partition_cols=['partition'], index=False)
+        return
+    table = time_series.pivot(index=['area', 'ind'], columns='year', values='value')
+    table = table.reindex(columns=years)
+    table.columns.name = None
+    for area_code, area_table in table.groupby(level='area', sort=False):
+        area_table = area_table.droplevel('area')
+        area_table.index.name = None
+        area_table.to_csv(f'{name}_{area_code}_{measure}.csv')
+
+
+def check_state(state, years, key, name):
+    """
+    Print the discrepancies of the estimated trees of a state and write them with the time series
+    """
+    nodes = flatten_state(state, years, key)
+    rows, sums = get_area_discrepancies(nodes)
+    parents = nodes['value'][rows]
+    differences = np.abs(parents - sums)
+    print('Milestone a)')
+    for i_year, year in enumerate(years):
+        print(f'year {year}')
+        in_year = nodes['year'][rows] == i_year
+        for row, parent, the_sum, difference in zip(
+            rows[in_year], parents[in_year], sums[in_year], differences[in_year]
+        ):
+            if difference > 1:
+                print(
+                    f"area {nodes['area'][row]} ind {nodes['ind'][row]} - the difference is "
+                    f"{difference} = abs({parent} - {the_sum})"
+                )
+        print_summary(pd.Series(differences[in_year], dtype=float))
+
+    print('Milestones b) and c)')
+    differences = get_state_county_differences(state, years, key, nodes)
+    differences.to_csv(f'differences_{name}_{get_measure_name(key)}.csv')
+    print_summary(differences)
+
+    save_time_series(state, years, key, name, nodes)
@@ -0,0 +1,280 @@
+"""
+Per-year LPs of a state solved in a pool of processes
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy import sparse
+
+from .components import split_problem
+from .constraints import (
+    get_sparse_constraints, get_structure, get_structure_constraints, split_measure
+)
+from .presolve import presolve_lp
+from .solvers import merge_reports, solve_lp
+
+
+def build_year(trees, year, key):
+    """
+    Return c, A, b, the variables and the build time of the LP min sum x subject to A x <= b,
+    x >= 0 of the trees of a year
+    """
+    start = time.perf_counter()
+    A, b, variables = get_sparse_constraints({year: trees}, year, key)
+    return np.ones(len(variables)), A, b, variables, time.perf_counter() - start
+
+
+def get_sizes(A, variables):
+    """
+    Return the rows, variables and nonzeros of the constraints of a year
+    """
+    return {'rows': A.shape[0], 'variables': len(variables), 'nnz': int(A.nnz)}
+
+
+def reduce_problem(c, A, b, presolve):
+    """
+    Return the columns and the reduced c, A, b of the variables left by the presolve of
+    min c x subject to A x <= b, x >= 0, the values x0 it fixed and its report
+    """
+    if not presolve:
+        return np.arange(len(c)), c, A, b, np.zeros(len(c)), {}
+    columns, x0, A_ub, b_ub, _, _, variables, rows = presolve_lp(len(c), A, b)
+    report = {'presolved_variables': variables, 'presolved_rows': rows}
+    return columns, c[columns], A_ub, b_ub, x0, report
+
+
+def solve_problem(c, A, b, backend, options, decompose=True, presolve=True, executor=None):
+    """
+    Return the solution and the report of min c x subject to A x <= b, x >= 0 after the presolve,
+    solving its connected components one after the other when decompose is set, or in the pool
+    of the executor when one is given
+    """
+    start = time.perf_counter()
+    columns, c, A, b, x, presolve_report = reduce_problem(c, A, b, presolve)
+    presolve_time = time.perf_counter() - start
+    if not decompose:
+        subproblems = [(np.arange(len(c)), c, A, b)]
+    else:
+        subproblems = split_problem(c, A, b)
+    subproblems = [subproblem for subproblem in subproblems if len(subproblem[0]) > 0]
+    if executor is None:
+        results = [
+            solve_lp(c_k, A_k, b_k, backend=backend, **options) for _, c_k, A_k, b_k in subproblems
+        ]
+    else:
+        results = [
+            future.result() for future in [
+                executor.submit(solve_lp, c_k, A_k, b_k, backend=backend, **options)
+                for _, c_k, A_k, b_k in subproblems
+            ]
+        ]
+    for (columns_k, _, _, _), (x_k, _) in zip(subproblems, results):
+        x[columns[columns_k]] += x_k
+    report = merge_reports([report for _, report in results])
+    report['build_time'] += presolve_time
+    report.update(presolve_report)
+    return x, report
+
+
+def solve_year(trees, year, key, backend, options, decompose=True, presolve=True, executor=None):
+    """
+    Return the variables, the solution and the report of the LP of the trees of a year, its
+    connected components being solved in the pool of the executor when one is given
+    """
+    c, A, b, variables, build_time = build_year(trees, year, key)
+    x, report = solve_problem(c, A, b, backend, options, decompose, presolve, executor)
+    report['build_time'] += build_time
+    report.update(get_sizes(A, variables))
+    return variables, x, report
+
+
+def build_measures(trees, measures):
+    """
+    Return c, A, b and the variables of the LP of every measure of the trees of a year, all built
+    from one traversal of the trees. Establishment weighted measures minimize sum x / est subject
+    to A x = b, written as A x <= b and -A x <= -b
+    """
+    keys = {split_measure(measure)[0] for measure in measures}
+    structure = get_structure(trees, ['est'] + sorted(keys - {'est'}))
+    problems = []
+    for measure in measures:
+        key, weighted = split_measure(measure)
+        A, b, variables, establishments = get_structure_constraints(structure, key)
+        if weighted:
+            problems.append((
+                1 / np.maximum(establishments, 1), sparse.vstack([A, -A], format='csr'),
+                np.concatenate([b, -b]), variables
+            ))
+        else:
+            problems.append((np.ones(len(variables)), A, b, variables))
+    return problems
+
+
+def build_periods_measures(state, periods, measures):
+    """
+    Return the blocks (period, measure), their LPs and scales, and c, A, b and the build time of
+    the block diagonal LP of all the measures of all the periods, every block scaled by its
+    largest constant
+    """
+    start = time.perf_counter()
+    blocks = []
+    problems = []
+    for period in periods:
+        for measure, problem in zip(measures, build_measures(state[period], measures)):
+            blocks.append((period, measure))
+            problems.append(problem)
+    scales = [max(np.max(np.abs(b), initial=0), 1.0) for _, _, b, _ in problems]
+    c = np.concatenate([c_k for c_k, _, _, _ in problems])
+    A = sparse.block_diag([A_k for _, A_k, _, _ in problems], format='csr')
+    b = np.concatenate([b_k / scale for (_, _, b_k, _), scale in zip(problems, scales)])
+    return blocks, problems, scales, c, A, b, time.perf_counter() - start
+
+
+def split_periods_measures(blocks, problems, scales, A, x, report):
+    """
+    Return {period: {measure: (variables, x, report)}} of the solution of the block diagonal LP
+    """
+    report.update(get_sizes(A, np.concatenate([variables for _, _, _, variables in problems])))
+    solutions = {period: {} for period, _ in blocks}
+    bounds = np.cumsum([0] + [len(variables) for _, _, _, variables in problems])
+    for (period, measure), (_, _, _, variables), scale, start_k, end_k in zip(
+        blocks, problems, scales, bounds[:-1], bounds[1:]
+    ):
+        solutions[period][measure] = (variables, x[start_k:end_k] * scale, report)
+    return solutions
+
+
+def solve_periods_measures(
+    state, periods, measures, backend, options, decompose=True, presolve=True
+):
+    """
+    Return {period: {measure: (variables, x, report)}} of the trees of several periods e.g. the
+    quarters of a year, the LPs of all the measures of all the periods being solved as one block
+    diagonal LP
+    """
+    blocks, problems, scales, c, A, b, build_time = build_periods_measures(
+        state, periods, measures
+    )
+    x, report = solve_problem(c, A, b, backend, options, decompose, presolve)
+    report['build_time'] += build_time
+    return split_periods_measures(blocks, problems, scales, A, x, report)
+
+
+def solve_in_pool(executor, problems, backend, options, decompose, presolve):
+    """
+    Yield (tag, x, report) of the LPs (tag, c, A, b) as they are solved in the pool of the
+    executor. The LPs are built in this process and only c, A and b are sent to the workers, so
+    that they can be spawned as well as forked
+    """
+    futures = {
+        executor.submit(solve_problem, c, A, b, backend, options, decompose, presolve): tag
+        for tag, c, A, b in problems
+    }
+    for future in as_completed(futures):
+        x, report = future.result()
+        yield futures[future], x, report
+
+
+def solve_years_measures(
+    state, years, measures, backend, options, workers=1, decompose=True, presolve=True,
+    batch=True, callback=None, groups=None
+):
+    """
+    Return {year: {measure: (variables, x, report)}} of several measures e.g. ('emp', 'wages'),
+    solving the measures of a year as one LP when batch is set or as concurrent LPs otherwise,
+    calling callback(year, solutions) as soon as all the measures of a year are solved. With
+    batch, groups of years e.g. [['2021Q1', ..., '2021Q4']] are solved together as one LP
+    """
+    if groups is None:
+        groups = [[year] for year in years]
+    if batch:
+        jobs = [(tuple(group), tuple(measures)) for group in groups]
+    else:
+        jobs = [((year,), (measure,)) for year in years for measure in measures]
+    solutions = {year: {} for year in years}
+
+    def collect(job_solutions):
+        for year, year_solutions in job_solutions.items():
+            solutions[year].update(year_solutions)
+            if len(solutions[year]) == len(measures) and callback is not None:
+                callback(year, solutions[year])
+
+    if workers == 1:
+        for job_years, job_measures in jobs:
+            collect(solve_periods_measures(
+                state, job_years, job_measures, backend, options, decompose, presolve
+            ))
+        return solutions
+    def build_jobs():
+        for job_years, job_measures in jobs:
+            blocks, problems, scales, c, A, b, build_time = build_periods_measures(
+                state, job_years, job_measures
+            )
+            yield (blocks, problems, scales, A, build_time), c, A, b
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for (blocks, problems, scales, A, build_time), x, report in solve_in_pool(
+            executor, build_jobs(), backend, options, decompose, presolve
+        ):
+            report['build_time'] += build_time
+            collect(split_periods_measures(blocks, problems, scales, A, x, report))
+        return solutions
+
+
+def solve_years_by_component(
+    executor, state, years, key, backend, options, presolve, callback=None
+):
+    """
+    Return {year: (variables, x, report)} building the years here and solving their
+    connected components in the pool of the executor
+    """
+    solutions = {}
+    for year in years:
+        solutions[year] = solve_year(
+            state[year], year, key, backend, options, True, presolve, executor
+        )
+        if callback is not None:
+            callback(year, solutions[year])
+    return solutions
+
+
+def solve_years(
+    state, years, key, backend, options, workers=1, decompose=True, presolve=True,
+    callback=None
+):
+    """
+    Return {year: (variables, x, report)} solving every year in its own process, or the
+    connected components of the years in parallel when there are fewer years than workers,
+    or everything in this process when workers is 1, calling callback(year, solution) as soon
+    as a year is solved
+    """
+    solutions = {}
+    if workers == 1:
+        for year in years:
+            solutions[year] = solve_year(
+                state[year], year, key, backend, options, decompose, presolve
+            )
+            if callback is not None:
+                callback(year, solutions[year])
+        return solutions
+
+    def build_years():
+        for year in years:
+            c, A, b, variables, build_time = build_year(state[year], year, key)
+            yield (year, variables, build_time, get_sizes(A, variables)), c, A, b
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if decompose and workers is not None and len(years) < workers:
+            return solve_years_by_component(
+                executor, state, years, key, backend, options, presolve, callback
+            )
+        for (year, variables, build_time, sizes), x, report in solve_in_pool(
+            executor, build_years(), backend, options, decompose, presolve
+        ):
+            report['build_time'] += build_time
+            report.update(sizes)
+            solutions[year] = (variables, x, report)
+            if callback is not None:
+                callback(year, solutions[year])
+        return {year: solutions[year] for year in years}
@@ -0,0 +1,301 @@
+"""
+Estimation of the undisclosed data of a state: fetch, tree build, solve, write-back and shards
+"""
+import os
+
+from .area_index import get_period_columns
+from .checkpoint import hash_content, load_checkpoint, prune_checkpoints, save_checkpoint
+from .constraints import split_measure
+from .download import fetch_state_areas
+from .equations import get_state_constraints
+from .incremental import solve_years_incrementally
+from .instrument import record, timer
+from .parallel import solve_years, solve_years_measures
+from .shards import shard_path, write_shard
+from .tree import build_county_tree, build_state_tree, index_tree
+
+from .config import settings
+
+
+def extract_codes(variable_name):
+    """
+    Return county code and industry code from a variable's name
+    """
+    positions = [i for i, letter in enumerate(variable_name) if letter == '_']
+    return variable_name[positions[0]+1:positions[1]], variable_name[positions[1]+1:].strip()
+
+
+def get_periods(years, period='a'):
+    """
+    Return (period, year, quarter) of the years: the years themselves for annual averages 'a',
+    or labels such as 2021Q1 for a quarter 1 to 4, or for all of them with 'q'
+    """
+    if period == 'a':
+        return [(year, year, 'a') for year in years]
+    quarters = ['1', '2', '3', '4'] if period == 'q' else [period]
+    return [(f'{year}Q{quarter}', year, quarter) for year in years for quarter in quarters]
+
+
+def build_area_tree(df, is_state, resume=False, columns=None, checkpoint=False):
+    """
+    Return the tree of an area table, the state tree for the first area of a state, with the
+    columns given as {node key: column} or the annual averages. The tree is checkpointed under
+    the hash of the table only with checkpoint or resume
+    """
+    if not (checkpoint or resume):
+        if is_state:
+            return build_state_tree(df, '10', settings.state_root_aggregation, columns)
+        return build_county_tree(df, '10', settings.county_root_aggregation, columns)
+    tree_settings = [
+        settings.county_highest_aggregation, settings.county_lowest_aggregation,
+        settings.state_highest_aggregation, settings.state_lowest_aggregation,
+    ]
+    tree_key = hash_content('tree', tree_settings, is_state, columns, df)
+    tree = None
+    if resume:
+        tree = load_checkpoint(settings.checkpoint_dir, 'tree', tree_key)
+    if tree is None:
+        tree = build_area_tree(df, is_state, columns=columns)
+        save_checkpoint(settings.checkpoint_dir, 'tree', tree_key, tree)
+    return tree
+
+
+def build_state(state_code, years, period='a', resume=False, area_codes=None, checkpoint=False):
+    """
+    Return the area codes of a state and {period: {area: tree}} of the periods of get_periods,
+    the state tree first. The area file of a quarter is read once and its trees carry the
+    employment of the three months as emp1, emp2 and emp3
+    """
+    periods = get_periods(years, period)
+    with timer('load', state=state_code) as counts:
+        area_codes, areas = fetch_state_areas(
+            state_code, years, list(dict.fromkeys(quarter for _, _, quarter in periods)),
+            area_codes=area_codes
+        )
+        counts['areas'] = len(areas)
+    columns = get_period_columns(period)
+    state = {}
+    for label, year, quarter in periods:
+        state[label] = {}
+        for i_area, area_code in enumerate(area_codes):
+            df = areas[(year, quarter, area_code)]
+            with timer('tree', label, area_code, rows=len(df)) as counts:
+                state[label][area_code] = build_area_tree(
+                    df, i_area == 0, resume, columns, checkpoint
+                )
+                counts['nodes'] = len(index_tree(state[label][area_code]))
+    return area_codes, state
+
+
+def write_constraints(state, year, key):
+    """
+    Write the string equations of the LP of a year to constraints_{year}.txt, or
+    constraints_{key}_{year}.txt for other keys than employment
+    """
+    path = f'constraints_{year}.txt' if key == 'emp' else f'constraints_{key}_{year}.txt'
+    with open(path, 'w') as fp:
+        fp.write('\n'.join(get_state_constraints(state, year, key)))
+
+
+def solve_measures(state, years, measures, workers=None, callback=None, groups=None):
+    """
+    Return {year: {measure: (variables, x, report)}} of the years of a state: one measure is
+    solved as before, several ones from shared constraint structures in batched or concurrent LPs,
+    the batches spanning the groups of years given e.g. the quarters of a year
+    """
+    workers = workers or settings.lp_workers
+    if len(measures) == 1 and not split_measure(measures[0])[1]:
+        key = measures[0]
+
+        def save_key(year, solution):
+            """
+            Pass the solution of the year to the callback keyed by its measure
+            """
+            if callback is not None:
+                callback(year, {key: solution})
+
+        if settings.lp_incremental:
+            solutions = solve_years_incrementally(
+                state, years, key, settings.lp_solver, settings.lp_solver_options, save_key
+            )
+        else:
+            solutions = solve_years(
+                state, years, key, settings.lp_solver, settings.lp_solver_options, workers,
+                settings.lp_decompose, settings.lp_presolve, save_key
+            )
+        return {year: {key: solution} for year, solution in solutions.items()}
+    if settings.lp_incremental:
+        raise Exception('The incremental mode solves one measure without establishment weights.')
+    return solve_years_measures(
+        state, years, measures, settings.lp_solver, settings.lp_solver_options, workers,
+        settings.lp_decompose, settings.lp_presolve, settings.lp_batch_measures, callback,
+        groups
+    )
+
+
+def solve_state(
+    state, years, measures, workers=None, resume=False, groups=None, checkpoint=False
+):
+    """
+    Return {year: {measure: (variables, x, report)}} of the years of a state and the years
+    actually solved, the others being resumed from their checkpoints. The solutions are
+    checkpointed only with checkpoint or resume
+    """
+    if not (checkpoint or resume):
+        return solve_measures(state, years, measures, workers, None, groups), years
+    solution_settings = [
+        settings.lp_solver, settings.lp_solver_options, settings.lp_decompose,
+        settings.lp_presolve, settings.lp_incremental, settings.lp_batch_measures,
+    ]
+    solution_keys = {
+        year: hash_content('solved', solution_settings, measures, year, state[year])
+        for year in years
+    }
+    solutions = {}
+    if resume:
+        for year in years:
+            solution = load_checkpoint(settings.checkpoint_dir, 'solved', solution_keys[year])
+            if solution is not None:
+                solutions[year] = solution
+    pending_years = [year for year in years if year not in solutions]
+
+    def save_solution(year, solution):
+        """
+        Checkpoint the solution of a year as soon as it is solved
+        """
+        save_checkpoint(settings.checkpoint_dir, 'solved', solution_keys[year], solution)
+
+    if groups is not None:
+        groups = [
+            [year for year in group if year in pending_years] for group in groups
+        ]
+        groups = [group for group in groups if len(group) > 0]
+    solutions.update(
+        solve_measures(state, pending_years, measures, workers, save_solution, groups)
+    )
+    return solutions, pending_years
+
+
+def write_solution(trees, measure, variables, x):
+    """
+    Write the solution of the LP of a measure of a year into its trees as {measure}_lp
+    """
+    indexes = {code: index_tree(tree) for code, tree in trees.items()}
+    for variable, x_j in zip(variables, x):
+        area_code, ind = extract_codes(variable)
+        indexes[area_code][ind][f'{measure}_lp'] = max(float(x_j), 0.0)
+
+
+def write_trees(trees, year, resume=False, checkpoint=False):
+    """
+    Write the shards of the trees of a year, skipping those already written with --resume,
+    and checkpoint them only with checkpoint or resume
+    """
+    for area_code, tree in trees.items():
+        written_key = None
+        if checkpoint or resume:
+            written_key = hash_content('written', settings.shard_dir, year, area_code, tree)
+        if resume and os.path.exists(shard_path(settings.shard_dir, year, area_code)):
+            if load_checkpoint(settings.checkpoint_dir, 'written', written_key):
+                continue
+        with timer('output', year, area_code):
+            write_shard(settings.shard_dir, year, area_code, tree)
+        if written_key is not None:
+            save_checkpoint(settings.checkpoint_dir, 'written', written_key, True)
+
+
+def record_report(year, report):
+    """
+    Record the constraint build and the solve of a year from its solve report
+    """
+    record(
+        'constraints', year, seconds=report['build_time'], rows=report.get('rows', 0),
+        variables=report.get('variables', 0), nnz=report.get('nnz', 0),
+        presolved_variables=report.get('presolved_variables', 0),
+        presolved_rows=report.get('presolved_rows', 0)
+    )
+    record(
+        'solve', year, seconds=report['solve_time'], iterations=report['iterations'],
+        subproblems=report.get('subproblems', 1), status=report['status']
+    )
+
+
+def group_reports(solutions, measures):
+    """
+    Return (report, measures) of the distinct reports of the solutions of a year, measures
+    solved as one LP sharing their report
+    """
+    groups = []
+    for measure in measures:
+        report = solutions[measure][2]
+        for group_report, group_measures in groups:
+            if group_report is report:
+                group_measures.append(measure)
+                break
+        else:
+            groups.append((report, [measure]))
+    return groups
+
+
+def format_report(report):
+    """
+    Return the line printed for the solve report of a year
+    """
+    return (
+        f"build {report['build_time']:.3f}s, {report['backend']} {report['status']}: "
+        f"solve {report['solve_time']:.3f}s, {report['iterations']} iterations, "
+        f"{report.get('subproblems', 1)} subproblems, presolve eliminated "
+        f"{report.get('presolved_variables', 0)} variables and {report.get('presolved_rows', 0)} rows"
+    )
+
+
+def estimate_state(
+    state_code, years, measures=('emp',), period='a', workers=None, resume=False,
+    area_codes=None, checkpoint=False
+):
+    """
+    Return {period: {area: tree}} of a state with the undisclosed values of every measure
+    estimated as {measure}_lp, writing the estimated trees as shards. The quarters of a year,
+    e.g. the monthly measures emp1, emp2 and emp3 of its 4 quarters, are solved as one batch.
+    The stages are checkpointed with checkpoint, resume or CHECKPOINT=true, the least recently
+    used checkpoints being removed above CHECKPOINT_MAX_BYTES at the end
+    """
+    measures = list(measures)
+    checkpoint = checkpoint or resume or settings.checkpoint
+    print('Loading data from BLS ... ')
+    _, state = build_state(state_code, years, period, resume, area_codes, checkpoint)
+    periods = get_periods(years, period)
+    groups = None
+    if period != 'a':
+        groups = [
+            [label for label, year, _ in periods if year == group_year] for group_year in years
+        ]
+    years = [label for label, _, _ in periods]
+    if settings.dump_constraints:
+        for year in years:
+            for key in sorted({split_measure(measure)[0] for measure in measures}):
+                write_constraints(state, year, key)
+    print('Estimating undisclosed data... ')
+    solutions, pending_years = solve_state(
+        state, years, measures, workers, resume, groups, checkpoint
+    )
+    # the report of a batch is shared by all its years and recorded once
+    recorded = set()
+    for year in years:
+        print(f'*** {year} ***')
+        if year not in pending_years:
+            print('solution resumed from checkpoint')
+        for report, report_measures in group_reports(solutions[year], measures):
+            if year in pending_years and id(report) not in recorded:
+                record_report(year, report)
+                recorded.add(id(report))
+            line = format_report(report)
+            print(line if len(measures) == 1 else f"{'+'.join(report_measures)}: {line}")
+        for measure in measures:
+            variables, x, _ = solutions[year][measure]
+            with timer('write_back', year, variables=len(variables)):
+                write_solution(state[year], measure, variables, x)
+        write_trees(state[year], year, resume, checkpoint)
+    if checkpoint:
+        prune_checkpoints(settings.checkpoint_dir, settings.checkpoint_max_bytes)
+    return state
@@ -0,0 +1,114 @@
+"""
+Presolve of the linear programs A_ub x <= b_ub, A_eq x = b_eq, x >= 0
+"""
+import numpy as np
+from scipy import sparse
+
+from .solvers import empty_constraints
+
+
+def get_tolerance(values):
+    """
+    Return the feasibility tolerance of values
+    """
+    return 1e-9 * (1 + np.abs(values))
+
+
+def get_singletons(A, rows, active_columns):
+    """
+    Return the column and the coefficient of the only active variable of every given row
+    """
+    singletons = sparse.csr_matrix(A[rows].multiply(active_columns.reshape(1, -1)))
+    singletons.eliminate_zeros()
+    return singletons.indices, singletons.data
+
+
+def fix_variables(lower, upper, columns, values):
+    """
+    Fix the given columns to values, raising when a value is out of the bounds of its column
+    """
+    out_of_bounds = (
+        (values < lower[columns] - get_tolerance(values))
+        | (values > upper[columns] + get_tolerance(values))
+    )
+    if np.any(out_of_bounds):
+        raise Exception('Presolve found conflicting constraints: the problem is infeasible.')
+    values = np.clip(values, lower[columns], upper[columns])
+    lower[columns] = values
+    upper[columns] = values
+    if np.any(np.abs(values - lower[columns]) > get_tolerance(values)):
+        raise Exception('Presolve found conflicting constraints: the problem is infeasible.')
+
+
+def presolve_lp(n, A_ub=None, b_ub=None, A_eq=None, b_eq=None):
+    """
+    Return the columns of the remaining variables, the values x0 of the eliminated variables and
+    lower bounds, the reduced A_ub, b_ub, A_eq, b_eq over the remaining variables and the
+    numbers of eliminated variables and rows, x being x0 plus the reduced solution on columns.
+    Singleton rows are substituted (equalities) or turned into bounds (inequalities) until no
+    row has a single variable left, and empty rows are dropped
+    """
+    A_ub, b_ub = empty_constraints(A_ub, b_ub, n)
+    A_eq, b_eq = empty_constraints(A_eq, b_eq, n)
+    pattern_ub = sparse.csr_matrix(A_ub, dtype=bool).astype(float)
+    pattern_eq = sparse.csr_matrix(A_eq, dtype=bool).astype(float)
+    lower = np.zeros(n)
+    upper = np.full(n, np.inf)
+    x0 = np.zeros(n)
+    active_columns = np.ones(n, dtype=bool)
+    active_ub = np.ones(A_ub.shape[0], dtype=bool)
+    active_eq = np.ones(A_eq.shape[0], dtype=bool)
+    while True:
+        residual_ub = b_ub - A_ub @ x0
+        residual_eq = b_eq - A_eq @ x0
+        count_ub = pattern_ub @ active_columns.astype(float)
+        count_eq = pattern_eq @ active_columns.astype(float)
+        empty_ub = active_ub & (count_ub == 0)
+        empty_eq = active_eq & (count_eq == 0)
+        if np.any(residual_ub[empty_ub] < -get_tolerance(b_ub[empty_ub])) or np.any(
+            np.abs(residual_eq[empty_eq]) > get_tolerance(b_eq[empty_eq])
+        ):
+            raise Exception('Presolve found an empty row that does not hold: the problem is infeasible.')
+        active_ub &= ~empty_ub
+        active_eq &= ~empty_eq
+        singleton_eq = np.flatnonzero(active_eq & (count_eq == 1))
+        singleton_ub = np.flatnonzero(active_ub & (count_ub == 1))
+        if len(singleton_eq) == 0 and len(singleton_ub) == 0:
+            break
+        columns, coefficients = get_singletons(A_eq, singleton_eq, active_columns)
+        fix_variables(lower, upper, columns, residual_eq[singleton_eq] / coefficients)
+        columns, coefficients = get_singletons(A_ub, singleton_ub, active_columns)
+        bounds = residual_ub[singleton_ub] / coefficients
+        positive = coefficients > 0
+        np.minimum.at(upper, columns[positive], bounds[positive])
+        np.maximum.at(lower, columns[~positive], bounds[~positive])
+        if np.any(lower > upper + get_tolerance(lower)):
+            raise Exception('Presolve found conflicting bounds: the problem is infeasible.')
+        active_eq[singleton_eq] = False
+        active_ub[singleton_ub] = False
+        fixed = np.flatnonzero(active_columns & (upper - lower <= get_tolerance(lower)))
+        x0[fixed] = lower[fixed]
+        active_columns[fixed] = False
+    columns = np.flatnonzero(active_columns)
+    # the remaining variables are shifted by their lower bounds
+    x0[columns] = lower[columns]
+    bounded = np.flatnonzero(np.isfinite(upper[columns]))
+    reduced_A_ub = sparse.vstack([
+        A_ub[np.flatnonzero(active_ub)][:, columns],
+        sparse.csr_matrix(
+            (np.ones(len(bounded)), (np.arange(len(bounded)), bounded)),
+            shape=(len(bounded), len(columns))
+        ),
+    ], format='csr')
+    reduced_b_ub = np.concatenate([
+        (b_ub - A_ub @ x0)[active_ub], upper[columns][bounded] - lower[columns][bounded]
+    ])
+    reduced_A_eq = A_eq[np.flatnonzero(active_eq)][:, columns]
+    reduced_b_eq = (b_eq - A_eq @ x0)[active_eq]
+    eliminated_rows = (
+        A_ub.shape[0] + A_eq.shape[0] - reduced_A_ub.shape[0] - reduced_A_eq.shape[0]
+    )
+    return (
+        columns, x0, reduced_A_ub, reduced_b_ub, reduced_A_eq, reduced_b_eq,
+        n - len(columns), eliminated_rows
+    )
@@ -0,0 +1,181 @@
+"""
+Estimation of many states as (state, year) jobs run in a pool of processes within a memory budget
+"""
+import contextlib
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .cache import release_used
+from .download import state_area_codes, with_retries
+from .instrument import record, records, reset, summarize
+from .pipeline import estimate_state, get_periods
+from .shards import shard_path
+
+from .config import settings
+
+# FIPS codes of the 50 states and the District of Columbia
+state_codes = [
+    '01', '02', '04', '05', '06', '08', '09', '10', '11', '12', '13', '15', '16', '17', '18',
+    '19', '20', '21', '22', '23', '24', '25', '26', '27', '28', '29', '30', '31', '32', '33',
+    '34', '35', '36', '37', '38', '39', '40', '41', '42', '44', '45', '46', '47', '48', '49',
+    '50', '51', '53', '54', '55', '56',
+]
+
+
+def get_jobs(states, years, period='a'):
+    """
+    Return one job per state and year sized by the areas of the state times the periods of a year,
+    with the memory it is expected to take. The areas are listed once per state, from the last
+    year as estimate_state does, and the jobs of a state whose areas cannot be listed carry the
+    error instead
+    """
+    quarter = get_periods(years, period)[0][2]
+    periods = len(get_periods(years[:1], period))
+    jobs = []
+    for state_code in states:
+        area_codes, error = [], None
+        try:
+            area_codes = with_retries(state_area_codes, state_code, max(years), quarter)
+        except Exception as exception:
+            error = f'{type(exception).__name__}: {exception}'
+        areas = len(area_codes)
+        if areas == 0 and error is None:
+            error = f'No areas of state {state_code} in the industry 102 file.'
+        for year in years:
+            jobs.append({
+                'state': state_code, 'year': year, 'areas': areas, 'area_codes': area_codes,
+                'size': areas * periods, 'memory': areas * periods * settings.scheduler_area_bytes,
+                'error': error,
+            })
+    return jobs
+
+
+def run_job(state_code, year, period, measures, area_codes):
+    """
+    Return the status, the time, the stage summary and the shards written of the estimation of
+    a state in a year, its output and warnings being logged to {state}_{year}.log in the log
+    directory
+    """
+    reset()
+    release_used()
+    os.makedirs(settings.scheduler_log_dir, exist_ok=True)
+    log_path = os.path.join(settings.scheduler_log_dir, f'{state_code}_{year}.log')
+    start = time.perf_counter()
+    result = {'status': 'ok', 'error': None, 'log': log_path, 'outputs': []}
+    with open(log_path, 'w') as fp, contextlib.redirect_stdout(fp), contextlib.redirect_stderr(fp):
+        try:
+            state = estimate_state(
+                state_code, [year], measures, period, workers=1, area_codes=area_codes
+            )
+            result['outputs'] = [
+                shard_path(settings.shard_dir, label, area_code)
+                for label, trees in state.items() for area_code in trees
+            ]
+        except Exception as exception:
+            result['status'] = 'failed'
+            result['error'] = f'{type(exception).__name__}: {exception}'
+            traceback.print_exc(file=fp)
+    result['time'] = time.perf_counter() - start
+    result['stages'] = summarize(records)
+    return result
+
+
+def schedule(jobs, period='a', measures=('emp',), workers=None, budget=None):
+    """
+    Return the jobs with their results, run largest first in a pool of processes, starting a job
+    only while the memory of the running ones stays within the budget (a job larger than the
+    budget runs alone). A job failing does not stop the others, and the jobs of a worker pool
+    that died are run again one at a time, so that only the job killing its worker fails
+    """
+    workers = workers or settings.scheduler_workers
+    budget = budget or settings.scheduler_memory_budget
+    pending = sorted(
+        [dict(job, isolated=False) for job in jobs if job['error'] is None],
+        key=lambda job: job['size'], reverse=True
+    )
+    results = []
+    for job in jobs:
+        if job['error'] is not None:
+            results.append(dict(job, status='failed', time=0.0, stages={}, outputs=[], log=None))
+            record(
+                'job', job['year'], job['state'], 0.0, areas=job['areas'], failed=1,
+                status='failed'
+            )
+    running = {}
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while len(pending) > 0 or len(running) > 0:
+            reserved = sum(job['memory'] for job in running.values())
+            while len(pending) > 0 and len(running) < workers:
+                if any(job['isolated'] for job in running.values()):
+                    break
+                fitting = [
+                    job for job in pending
+                    if reserved + job['memory'] <= budget and not job['isolated']
+                ]
+                if len(fitting) == 0 and len(running) > 0:
+                    break
+                job = fitting[0] if len(fitting) > 0 else pending[0]
+                pending.remove(job)
+                future = executor.submit(
+                    run_job, job['state'], job['year'], period, list(measures), job['area_codes']
+                )
+                running[future] = dict(job, started=time.perf_counter())
+                reserved += job['memory']
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job = running.pop(future)
+                started = job.pop('started')
+                try:
+                    result = future.result()
+                except BrokenProcessPool as exception:
+                    broken = True
+                    if not job['isolated']:
+                        pending.insert(0, dict(job, isolated=True))
+                        continue
+                    result = {
+                        'status': 'failed', 'error': f'worker died: {exception}',
+                        'time': time.perf_counter() - started, 'stages': {}, 'outputs': [],
+                        'log': None,
+                    }
+                results.append(dict(job, **result))
+                record(
+                    'job', job['year'], job['state'], result['time'], areas=job['areas'],
+                    failed=int(result['status'] != 'ok'), status=result['status']
+                )
+            if broken:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return sorted(results, key=lambda result: (result['state'], result['year']))
+
+
+def schedule_states(states, years, period='a', measures=('emp',), workers=None, budget=None):
+    """
+    Return the results of the (state, year) jobs estimating the states in the years
+    """
+    print(f'Sizing {len(states)} states ...')
+    jobs = get_jobs(states, years, period)
+    print(f'Running {len(jobs)} jobs ...')
+    return schedule(jobs, period, measures, workers, budget)
+
+
+def print_jobs(results):
+    """
+    Print the status, the areas and the time of every job, and the errors of the failed ones
+    """
+    for result in results:
+        line = (
+            f"{result['state']} {result['year']} {result['status']:<6} {result['areas']:4d} areas "
+            f"{result['time']:9.3f}s"
+        )
+        if result['error'] is not None:
+            line += f"  {result['error']}"
+        print(line)
+    failed = sum(result['status'] != 'ok' for result in results)
+    print(f'{len(results) - failed} jobs succeeded, {failed} failed')
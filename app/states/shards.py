@@ -0,0 +1,84 @@
+"""
+Estimated trees stored as one JSON shard per year and area
+"""
+import json
+import os
+
+import numpy as np
+
+from .files import atomic_path
+
+
+class NpEncoder(json.JSONEncoder):
+    """
+    JSON encoder of NumPy scalars and arrays
+    """
+    def default(self, o):
+        if isinstance(o, np.integer):
+            return int(o)
+        if isinstance(o, np.floating):
+            return float(o)
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        return super().default(o)
+
+
+def shard_path(root, year, area):
+    """
+    Return the path of the shard of an area in a year
+    """
+    return os.path.join(root, str(year), f'{area}.json')
+
+
+def index_path(root):
+    """
+    Return the path of the index listing the shards in the order they were written
+    """
+    return os.path.join(root, 'index.jsonl')
+
+
+def write_shard(root, year, area, tree):
+    """
+    Write the tree of an area in a year and append it to the index
+    """
+    path = shard_path(root, year, area)
+    with atomic_path(path) as temporary_path, open(temporary_path, 'w') as fp:
+        json.dump(tree, fp, cls=NpEncoder)
+    with open(index_path(root), 'a') as fp:
+        fp.write(json.dumps({'year': year, 'area': area}) + '\n')
+
+
+def list_shards(root, years=None, areas=None):
+    """
+    Return the (year, area) of the shards in the index, in the order they were first written,
+    keeping only the given years and areas
+    """
+    shards = {}
+    if os.path.exists(index_path(root)):
+        with open(index_path(root), 'r') as fp:
+            for line in fp:
+                entry = json.loads(line)
+                shards[(entry['year'], entry['area'])] = None
+    return [
+        (year, area) for year, area in shards
+        if (years is None or year in years) and (areas is None or area in areas)
+    ]
+
+
+def iter_shards(root, years=None, areas=None):
+    """
+    Yield (year, area, tree) of the shards one at a time, keeping only the given years and areas
+    """
+    for year, area in list_shards(root, years, areas):
+        with open(shard_path(root, year, area), 'r') as fp:
+            yield year, area, json.load(fp)
+
+
+def load_state(root, years=None, areas=None):
+    """
+    Return {year: {area: tree}} of the shards, keeping only the given years and areas
+    """
+    state = {}
+    for year, area, tree in iter_shards(root, years, areas):
+        state.setdefault(year, {})[area] = tree
+    return state
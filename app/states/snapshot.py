@@ -0,0 +1,79 @@
+"""
+Columnar snapshots of BLS area files
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+from pyarrow import feather
+
+from .cache import cache_key, fetch_cached
+from .files import atomic_path
+from .instrument import timer
+from .config import settings
+
+
+def snapshot_key(year, quarter, area):
+    """
+    Return the hash of the cached file of an area and of the settings normalizing it
+    """
+    name = json.dumps([
+        cache_key('area', year, quarter, area), settings.ownership_code,
+        settings.snapshot_columns, settings.string_connecting_codes,
+    ])
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def snapshot_path(year, quarter, area):
+    """
+    Return the path of the snapshot given year, quarter (a for year), and area code, keyed by
+    its source and its normalization settings
+    """
+    return os.path.join(
+        settings.snapshot_dir, str(year), str(quarter),
+        f'{area}.{snapshot_key(year, quarter, area)[:16]}.feather'
+    )
+
+
+def normalize_area_data(df):
+    """
+    Return the area table restricted to the ownership, the columns and the dtypes the trees use
+    """
+    df = df[df['own_code']==settings.ownership_code]
+    columns = ['industry_code', 'agglvl_code', 'own_code'] + \
+        [column for column in settings.snapshot_columns if column in df.columns]
+    df = df[columns].reset_index(drop=True)
+    df['industry_code'] = df['industry_code'].str.replace(
+        '-',
+        settings.string_connecting_codes
+    ).astype('category')
+    df['agglvl_code'] = df['agglvl_code'].astype('int16')
+    df['own_code'] = df['own_code'].astype('int8')
+    for column in columns[3:]:
+        df[column] = df[column].astype('int64' if 'wages' in column else 'int32')
+    return df
+
+
+def ingest_area_data(year, quarter, area):
+    """
+    Write the snapshot of an area file unless it exists and return its path
+    """
+    path = snapshot_path(year, quarter, area)
+    if not os.path.exists(path):
+        csv_path = fetch_cached('area', year, quarter, area)
+        with timer('parse', year, area) as counts:
+            df = normalize_area_data(pd.read_csv(csv_path))
+            counts['rows'] = len(df)
+        with atomic_path(path) as temporary_path:
+            df.to_feather(temporary_path, compression='uncompressed')
+    return path
+
+
+def load_area_data(year, quarter, area):
+    """
+    Return a memory-mapped pandas table given year, quarter (a for year), and area code
+    """
+    url_path = f'{settings.qcew_api_url}/{year}/{quarter}/area/{area}.csv'
+    df = feather.read_feather(ingest_area_data(year, quarter, area), memory_map=True)
+    return df, url_path
@@ -0,0 +1,190 @@
+"""
+Solvers of the linear programs min c x subject to A_ub x <= b_ub, A_eq x = b_eq, x >= 0
+"""
+import importlib.metadata
+import time
+import warnings
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+
+backends = ('highs', 'ecos', 'osqp', 'cvxpy')
+
+
+def get_report(backend, status, build_time, solve_time, iterations):
+    """
+    Return the report of a solve
+    """
+    return {
+        'backend': backend,
+        'status': status,
+        'build_time': build_time,
+        'solve_time': solve_time,
+        'iterations': iterations,
+    }
+
+
+def merge_reports(reports):
+    """
+    Return one report of the solves of several subproblems
+    """
+    statuses = []
+    for report in reports:
+        if report['status'] not in statuses:
+            statuses.append(report['status'])
+    merged = get_report(
+        reports[0]['backend'] if len(reports) > 0 else '',
+        ', '.join(statuses),
+        sum(report['build_time'] for report in reports),
+        sum(report['solve_time'] for report in reports),
+        sum(report['iterations'] for report in reports),
+    )
+    merged['subproblems'] = len(reports)
+    return merged
+
+
+def empty_constraints(A, b, n):
+    """
+    Return A and b as a sparse matrix and a vector, with no rows when A is None
+    """
+    if A is None:
+        return sparse.csr_matrix((0, n)), np.zeros(0)
+    return sparse.csr_matrix(A), np.asarray(b, dtype=float)
+
+
+def solve_highs(c, A_ub, b_ub, A_eq, b_eq, **options):
+    """
+    Return the solution and the report of scipy's HiGHS
+    """
+    start = time.perf_counter()
+    result = linprog(
+        c,
+        A_ub=A_ub if A_ub.shape[0] > 0 else None,
+        b_ub=b_ub if A_ub.shape[0] > 0 else None,
+        A_eq=A_eq if A_eq.shape[0] > 0 else None,
+        b_eq=b_eq if A_eq.shape[0] > 0 else None,
+        bounds=(0, None),
+        method='highs',
+        options=options,
+    )
+    solve_time = time.perf_counter() - start
+    x = result.x if result.status == 0 else None
+    return x, get_report('highs', result.message, 0.0, solve_time, int(result.nit))
+
+
+def solve_ecos(c, A_ub, b_ub, A_eq, b_eq, **options):
+    """
+    Return the solution and the report of ECOS called without cvxpy
+    """
+    import ecos # pylint: disable=import-outside-toplevel
+    start = time.perf_counter()
+    n = len(c)
+    G = sparse.vstack([A_ub, -sparse.identity(n)], format='csc')
+    h = np.concatenate([b_ub, np.zeros(n)])
+    dims = {'l': G.shape[0], 'q': [], 'e': 0}
+    if A_eq.shape[0] > 0:
+        arguments = (c, G, h, dims, sparse.csc_matrix(A_eq), b_eq)
+    else:
+        arguments = (c, G, h, dims)
+    build_time = time.perf_counter() - start
+    solution = ecos.solve(*arguments, verbose=options.pop('verbose', False), **options)
+    info = solution['info']
+    x = solution['x'] if info['exitFlag'] in (0, 10) else None
+    return x, get_report(
+        'ecos', info['infostring'], build_time,
+        info['timing']['tsetup'] + info['timing']['tsolve'], int(info['iter'])
+    )
+
+
+def get_osqp_settings(options, warm_start=False):
+    """
+    Return the settings of OSQP, with tolerances tight enough and polishing for its solutions to
+    satisfy the constraints, which the defaults miss by units. osqp 1.0 renamed polish and
+    warm_start to polishing and warm_starting
+    """
+    renamed = int(importlib.metadata.version('osqp').split('.')[0]) >= 1
+    osqp_settings = {'verbose': False, 'eps_abs': 1e-9, 'eps_rel': 1e-9}
+    osqp_settings['polishing' if renamed else 'polish'] = True
+    if warm_start:
+        osqp_settings['warm_starting' if renamed else 'warm_start'] = True
+    return {**osqp_settings, **options}
+
+
+def solve_osqp(c, A_ub, b_ub, A_eq, b_eq, **options):
+    """
+    Return the solution and the report of OSQP with a zero quadratic term, no solution unless it
+    is solved to the tolerances
+    """
+    import osqp # pylint: disable=import-outside-toplevel
+    start = time.perf_counter()
+    n = len(c)
+    A = sparse.vstack([A_ub, A_eq, sparse.identity(n)], format='csc')
+    lower = np.concatenate([np.full(A_ub.shape[0], -np.inf), b_eq, np.zeros(n)])
+    upper = np.concatenate([b_ub, b_eq, np.full(n, np.inf)])
+    solver = osqp.OSQP()
+    solver.setup(
+        sparse.csc_matrix((n, n)), np.asarray(c, dtype=float), A, lower, upper,
+        **get_osqp_settings(options)
+    )
+    build_time = time.perf_counter() - start
+    result = solver.solve()
+    x = result.x if result.info.status_val == 1 else None
+    return x, get_report(
+        'osqp', result.info.status, build_time,
+        result.info.setup_time + result.info.solve_time, int(result.info.iter)
+    )
+
+
+def solve_cvxpy(c, A_ub, b_ub, A_eq, b_eq, solver=None, **options):
+    """
+    Return the solution and the report of cvxpy with the given solver, or the one cvxpy picks
+    among those installed
+    """
+    import cvxpy as cp # pylint: disable=import-outside-toplevel
+    start = time.perf_counter()
+    x = cp.Variable(len(c))
+    constraints = []
+    if A_ub.shape[0] > 0:
+        constraints.append(A_ub.tocsc() @ x <= b_ub)
+    if A_eq.shape[0] > 0:
+        constraints.append(A_eq.tocsc() @ x == b_eq)
+    constraints.append(x >= 0)
+    problem = cp.Problem(cp.Minimize(c @ x), constraints)
+    problem.solve(solver=solver, **options)
+    stats = problem.solver_stats
+    solve_time = stats.solve_time if stats.solve_time is not None else 0.0
+    build_time = time.perf_counter() - start - solve_time
+    return x.value, get_report(
+        f'cvxpy/{stats.solver_name}', problem.status, build_time, solve_time, stats.num_iters
+    )
+
+
+def solve_lp(c, A_ub=None, b_ub=None, A_eq=None, b_eq=None, backend='highs', **options):
+    """
+    Return the solution x and the report of min c x subject to A_ub x <= b_ub, A_eq x = b_eq,
+    x >= 0, falling back to HiGHS, which scipy always provides, when the backend is not installed
+    or fails, and to cvxpy with the solver it picks when HiGHS fails
+    """
+    if backend not in backends:
+        raise Exception(f'Unknown LP backend {backend}: it can be one of {", ".join(backends)}.')
+    c = np.asarray(c, dtype=float)
+    A_ub, b_ub = empty_constraints(A_ub, b_ub, len(c))
+    A_eq, b_eq = empty_constraints(A_eq, b_eq, len(c))
+    solve = {
+        'highs': solve_highs, 'ecos': solve_ecos, 'osqp': solve_osqp, 'cvxpy': solve_cvxpy
+    }[backend]
+    try:
+        x, report = solve(c, A_ub, b_ub, A_eq, b_eq, **options)
+    except ImportError:
+        x, report = None, get_report(backend, 'not installed', 0.0, 0.0, 0)
+    if x is None and backend not in ('highs', 'cvxpy'):
+        warnings.warn(f'LP backend {backend} failed ({report["status"]}), falling back to highs')
+        backend = 'highs'
+        x, report = solve_highs(c, A_ub, b_ub, A_eq, b_eq)
+    if x is None and backend == 'highs':
+        warnings.warn(f'LP backend highs failed ({report["status"]}), falling back to cvxpy')
+        x, report = solve_cvxpy(c, A_ub, b_ub, A_eq, b_eq)
+    if x is None:
+        raise Exception(f'The linear program could not be solved: {report["status"]}.')
+    return np.asarray(x), report
@@ -0,0 +1,184 @@
+"""
+Synthetic QCEW area tables of a state for benchmarks and offline runs
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .area_index import get_period_columns
+from .config import settings
+
+sectors = [
+    '11', '21', '22', '23', '31-33', '42', '44-45', '48-49', '51', '52', '53', '54', '55', '56',
+    '61', '62', '71', '72', '81', '99',
+]
+
+
+def get_naics_hierarchy(rng, branching):
+    """
+    Return {code: children codes} of a synthetic NAICS hierarchy from the sectors to 6 digits,
+    each node having 1 to branching children
+    """
+    hierarchy = {}
+    codes = list(sectors)
+    while len(codes) > 0:
+        code = codes.pop()
+        if len(code) == settings.max_digits_of_naics:
+            hierarchy[code] = []
+            continue
+        if '-' in code:
+            prefixes = [str(number) for number in range(int(code[0:2]), int(code[-2:]) + 1)]
+        else:
+            prefixes = [code]
+        children = set()
+        for _ in range(rng.integers(1, branching + 1)):
+            children.add(f'{rng.choice(prefixes)}{rng.integers(1, 10)}')
+        hierarchy[code] = sorted(children)
+        codes += hierarchy[code]
+    return hierarchy
+
+
+def get_leaf_values(rng, leaves, period='a'):
+    """
+    Return the establishments, employment and wages of leaves, followed for a quarter by the
+    employment of its months, the last one being the employment of the quarter
+    """
+    est = rng.geometric(0.2, len(leaves))
+    emp = np.maximum(np.round(est * rng.lognormal(2.0, 1.0, len(leaves))), 1).astype(np.int64)
+    wages = np.round(emp * rng.lognormal(10.8, 0.4, len(leaves))).astype(np.int64)
+    if period == 'a':
+        return est, emp, wages
+    months = [
+        np.maximum(np.round(emp * rng.lognormal(0.0, 0.05, len(leaves))), 1).astype(np.int64)
+        for _ in settings.monthly_employment
+    ]
+    return (est, months[-1], wages // 4, *months)
+
+
+def sum_hierarchy(hierarchy, code, values):
+    """
+    Write into values the sums of the children of code and its descendants, and return its values,
+    None when none of its leaves is in values
+    """
+    if code in values:
+        return values[code]
+    children = [sum_hierarchy(hierarchy, child, values) for child in hierarchy[code]]
+    children = [child for child in children if child is not None]
+    if len(children) == 0:
+        return None
+    values[code] = tuple(np.sum(children, axis=0))
+    return values[code]
+
+
+def get_aggregation(code, root_aggregation):
+    """
+    Return the aggregation level code of an industry given the root one, e.g. 74 to 78 for 71
+    """
+    if code == '10':
+        return root_aggregation
+    if '-' in code:
+        return root_aggregation + 3
+    return root_aggregation + len(code) + 1
+
+
+def get_area_table(area_code, values, root_aggregation, year, period='a'):
+    """
+    Return the area table in the layout of the BLS area files, private ownership and its total
+    """
+    codes = sorted(values)
+    columns = zip(*(values[code] for code in codes))
+    df = pd.DataFrame({
+        'area_fips': area_code,
+        'own_code': settings.ownership_code,
+        'industry_code': codes,
+        'agglvl_code': [get_aggregation(code, root_aggregation) for code in codes],
+        'size_code': 0,
+        'year': year,
+        'qtr': 'A' if period == 'a' else int(period),
+        'disclosure_code': '',
+        **{
+            column: np.array(column_values) for column, column_values in zip(
+                get_period_columns(period).values(), columns
+            )
+        },
+    })
+    total = df[df['industry_code']=='10'].assign(own_code=0, agglvl_code=root_aggregation - 1)
+    return pd.concat([total, df], ignore_index=True)
+
+
+def suppress(rng, df, suppression, period='a'):
+    """
+    Return the area table with a share of its private cells below the total undisclosed
+    """
+    suppressed = (
+        (rng.random(len(df)) < suppression)
+        & (df['own_code']==settings.ownership_code)
+        & (df['industry_code']!='10')
+    )
+    columns = get_period_columns(period)
+    df.loc[suppressed, sorted({column for key, column in columns.items() if key != 'est'})] = 0
+    df.loc[suppressed, 'disclosure_code'] = 'N'
+    return df
+
+
+def generate_state(
+    state_code='37', counties=20, suppression=0.3, branching=4, coverage=0.5, year=2021, seed=0,
+    period='a'
+):
+    """
+    Return {area code: area table} of a synthetic state, the state first: the counties cover a
+    random share of the leaves of a shared NAICS hierarchy, the state adds them up, and a share
+    of the cells of every area is suppressed. A quarter 1 to 4 as period gives the quarterly
+    columns and the employment of its months
+    """
+    rng = np.random.default_rng(seed)
+    hierarchy = get_naics_hierarchy(rng, branching)
+    hierarchy['10'] = list(sectors)
+    leaves = [code for code, children in hierarchy.items() if len(children) == 0]
+    county_values = {}
+    for i_county in range(counties):
+        covered = [leaf for leaf in leaves if rng.random() < coverage]
+        values = dict(zip(covered, zip(*get_leaf_values(rng, covered, period))))
+        sum_hierarchy(hierarchy, '10', values)
+        county_values[f'{state_code}{2*i_county+1:03d}'] = values
+    state_values = {}
+    for values in county_values.values():
+        for code, value in values.items():
+            state_values[code] = tuple(np.add(state_values.get(code, 0), value))
+    areas = {
+        f'{state_code}000': get_area_table(
+            f'{state_code}000', state_values, settings.state_root_aggregation, year, period
+        )
+    }
+    for area_code, values in county_values.items():
+        areas[area_code] = get_area_table(
+            area_code, values, settings.county_root_aggregation, year, period
+        )
+    return {
+        area_code: suppress(rng, df, suppression, period) for area_code, df in areas.items()
+    }
+
+
+def write_area_files(root, years, quarters=('a',), seed=0, **options):
+    """
+    Write synthetic states in the layout of the BLS API, {root}/{year}/{quarter}/area/{area}.csv
+    and the industry 102 files listing the areas, so that QCEW_API_URL=file://{root} runs offline
+    """
+    area_codes = []
+    for i_year, year in enumerate(years):
+        for i_quarter, quarter in enumerate(quarters):
+            areas = generate_state(
+                year=year, seed=seed + i_year*len(quarters) + i_quarter, period=quarter, **options
+            )
+            os.makedirs(os.path.join(root, str(year), quarter, 'area'), exist_ok=True)
+            for area_code, df in areas.items():
+                df.to_csv(
+                    os.path.join(root, str(year), quarter, 'area', f'{area_code}.csv'), index=False
+                )
+            area_codes = list(areas)
+    for quarter in quarters:
+        os.makedirs(os.path.join(root, str(max(years)), quarter, 'industry'), exist_ok=True)
+        pd.DataFrame({'area_fips': area_codes, 'industry_code': '102'}).to_csv(
+            os.path.join(root, str(max(years)), quarter, 'industry', '102.csv'), index=False
+        )
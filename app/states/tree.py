@@ -1,10 +1,12 @@
 """
 Tree methods for state level optimization
 """
-from helpers import get_node_variables, county_children_codes, county_aggregation, \
-    state_aggregation, state_children_codes
+from .area_index import (
+    get_indexed_children_codes, get_indexed_node, get_period_columns, index_area_data
+)
+from .helpers import county_aggregation, state_aggregation
 
-from config import settings
+from .config import settings
 
 
 def fetch_branch(tree, key, value):
@@ -45,35 +47,71 @@ def write_into(tree, key, value, data):
     return tree
 
 
-def build_county_tree(df, code, aggregation):
+def index_tree(tree, index=None):
     """
-    Return the complete tree with nodes and leaves
+    Return all the nodes in the tree keyed by industry code, to be rebuilt if children change
+    """
+    if index is None:
+        index = {}
+    index.setdefault(tree['ind'], tree)
+    for child in tree['children']:
+        index_tree(child, index)
+    return index
+
+
+def build_county_tree(df, code, aggregation, columns=None):
+    """
+    Return the complete tree with nodes and leaves, with the columns given as {node key: column}
+    or the annual averages
+    """
+    index = index_area_data(
+        df, settings.county_highest_aggregation, columns or get_period_columns(),
+        settings.ownership_code
+    )
+    return build_county_branch(index, code, aggregation)
+
+
+def build_county_branch(index, code, aggregation):
+    """
+    Return the branch with nodes and leaves given an indexed area table
     """
     if code is not None:
         aggregation = county_aggregation(aggregation)
-        est, emp, wages = get_node_variables(df, code, aggregation)
-        children_codes = county_children_codes(df, code, aggregation)
+        variables = get_indexed_node(index, code, aggregation)
+        children_codes = get_indexed_children_codes(index, code, aggregation)
         children = []
         if aggregation <= settings.county_lowest_aggregation:
             for child_code in children_codes:
-                children.append(build_county_tree(df, child_code, aggregation+1))
-        return {'ind': code, 'est': est, 'emp': emp, 'wages': wages,'children':children}
+                children.append(build_county_branch(index, child_code, aggregation+1))
+        return {'ind': code, **variables,'children':children}
     return None
 
 
-def build_state_tree(df, code, aggregation):
+def build_state_tree(df, code, aggregation, columns=None):
+    """
+    Return the complete tree with nodes and leaves, with the columns given as {node key: column}
+    or the annual averages
+    """
+    index = index_area_data(
+        df, settings.state_highest_aggregation, columns or get_period_columns(),
+        settings.ownership_code
+    )
+    return build_state_branch(index, code, aggregation)
+
+
+def build_state_branch(index, code, aggregation):
     """
-    Return the complete tree with nodes and leaves
+    Return the branch with nodes and leaves given an indexed area table
     """
     if code is not None:
         aggregation = state_aggregation(aggregation)
-        est, emp, wages = get_node_variables(df, code, aggregation)
-        children_codes = state_children_codes(df, code, aggregation)
+        variables = get_indexed_node(index, code, aggregation)
+        children_codes = get_indexed_children_codes(index, code, aggregation)
         children = []
         if aggregation <= settings.state_lowest_aggregation:
             for child_code in children_codes:
-                children.append(build_state_tree(df, child_code, aggregation+1))
-        return {'ind': code, 'est': est, 'emp': emp, 'wages': wages,'children':children}
+                children.append(build_state_branch(index, child_code, aggregation+1))
+        return {'ind': code, **variables,'children':children}
     return None
 
 
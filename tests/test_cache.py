@@ -0,0 +1,45 @@
+"""
+Size cap of the local cache of BLS files
+"""
+import os
+
+import pytest
+
+from app.states import cache
+from app.states.config import settings
+
+
+@pytest.fixture
+def small_cache(tmp_path, monkeypatch):
+    """
+    Return an empty cache of 250 bytes, with no file used yet
+    """
+    monkeypatch.setattr(settings, 'cache_dir', str(tmp_path))
+    monkeypatch.setattr(settings, 'cache_max_bytes', 250)
+    monkeypatch.setattr(cache, 'cache_state', {'size': None, 'used': set()})
+    return tmp_path
+
+
+def test_store_keeps_the_files_of_the_run(small_cache):
+    paths = [cache.store('area', 2021, 'a', str(code), b'x' * 100) for code in range(4)]
+    assert all(os.path.exists(path) for path in paths)
+    assert cache.cache_state['size'] == 400
+
+
+def test_release_used_enforces_the_cap(small_cache):
+    paths = [cache.store('area', 2021, 'a', str(code), b'x' * 100) for code in range(4)]
+    for age, path in enumerate(paths):
+        os.utime(path, (age, age))
+    cache.release_used()
+    assert [os.path.exists(path) for path in paths] == [False, False, True, True]
+    assert cache.cache_state['size'] == 200
+    path = cache.store('area', 2021, 'a', '4', b'x' * 100)
+    assert os.path.exists(path) and not os.path.exists(paths[2])
+    assert cache.cache_state['size'] == 200
+
+
+def test_failed_write_leaves_no_file(small_cache):
+    path = cache.cache_path(cache.cache_key('area', 2021, 'a', '5'))
+    with pytest.raises(TypeError):
+        cache.store('area', 2021, 'a', '5', 'not bytes')
+    assert os.listdir(os.path.dirname(path)) == []
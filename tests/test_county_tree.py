@@ -0,0 +1,37 @@
+"""
+County trees built from the columns and ownership code of the county settings
+"""
+import pandas as pd
+
+from app.county.config import settings
+from app.county.tree import build_tree
+
+
+def get_area_data():
+    """
+    Return a small quarterly area table with the rows of two ownership codes
+    """
+    rows = [('10', 71, 10, 100, 1000), ('11', 74, 6, 60, 600), ('21', 74, 4, 40, 400),
+            ('111', 75, 4, 45, 450), ('112', 75, 2, 15, 150)]
+    return pd.DataFrame(
+        [(code, aggregation, own_code, est * factor, emp * factor, wages * factor)
+         for own_code, factor in ((3, 1), (5, 7)) for code, aggregation, est, emp, wages in rows],
+        columns=[
+            'industry_code', 'agglvl_code', 'own_code', 'qtrly_estabs', 'month3_emplvl',
+            'total_qtrly_wages'
+        ]
+    )
+
+
+def test_build_tree_with_county_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'establishments', 'qtrly_estabs')
+    monkeypatch.setattr(settings, 'employment', 'month3_emplvl')
+    monkeypatch.setattr(settings, 'wages', 'total_qtrly_wages')
+    monkeypatch.setattr(settings, 'ownership_code', 3)
+    tree = build_tree(get_area_data(), '10', 71)
+    assert (tree['est'], tree['emp'], tree['wages']) == (10, 100, 1000)
+    assert [child['ind'] for child in tree['children']] == ['11', '21']
+    manufacturing = tree['children'][0]
+    assert [(child['ind'], child['emp']) for child in manufacturing['children']] == [
+        ('111', 45), ('112', 15)
+    ]
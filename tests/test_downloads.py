@@ -0,0 +1,101 @@
+"""
+Retries, backoff and timeout of the downloads against a local stand-in for the BLS API
+"""
+import contextlib
+import functools
+import http.server
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from app.states.cache import fetch_cached
+from app.states.config import settings
+from app.states.download import with_retries
+
+RETRIES = 2
+BACKOFF = 0.05
+TIMEOUT = 0.2
+
+
+class StandInHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Handler serving the files of a directory, answering the first requests of every path with
+    503 after stalling the given seconds
+    """
+
+    def do_GET(self):
+        """
+        Serve the file unless the request is one of the failing ones of its path
+        """
+        with self.server.lock:
+            count = self.server.requests.get(self.path, 0)
+            self.server.requests[self.path] = count + 1
+        if count < self.server.failures:
+            time.sleep(self.server.stall)
+            with contextlib.suppress(ConnectionError):
+                self.send_error(503)
+            return
+        super().do_GET()
+
+    def log_message(self, *args): # pylint: disable=arguments-differ
+        """
+        Keep the requests out of the output
+        """
+
+
+@contextlib.contextmanager
+def serve(root, failures=0, stall=0.0):
+    """
+    Serve the directory on a free local port in a thread and yield its url and the requests
+    counted by path
+    """
+    server = http.server.ThreadingHTTPServer(
+        ('127.0.0.1', 0), functools.partial(StandInHandler, directory=str(root))
+    )
+    server.failures, server.stall = failures, stall
+    server.requests, server.lock = {}, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}', server.requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def api_root(tmp_path, monkeypatch):
+    """
+    Return the root of the files served, with a cache of its own and short retries
+    """
+    folder = tmp_path / 'api' / '2021' / 'a' / 'industry'
+    folder.mkdir(parents=True)
+    (folder / '102.csv').write_text('area_fips,industry_code\n33000,10\n')
+    for name, value in {
+        'cache_dir': str(tmp_path / 'cache'), 'cache_offline': False,
+        'download_retries': RETRIES, 'download_backoff': BACKOFF, 'download_timeout': TIMEOUT,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    return tmp_path / 'api'
+
+
+@pytest.mark.parametrize('failures, stall, code, requests, error', [
+    (RETRIES, 0.0, '102', RETRIES + 1, None),
+    (RETRIES, 2 * TIMEOUT, '102', RETRIES + 1, None),
+    (RETRIES + 1, 0.0, '102', RETRIES + 1, urllib.error.HTTPError),
+    (0, 0.0, '999', 1, urllib.error.HTTPError),
+], ids=['failures retried', 'stalls timed out', 'retries used up', 'missing file'])
+def test_retries(api_root, monkeypatch, failures, stall, code, requests, error):
+    with serve(api_root, failures, stall) as (url, counts):
+        monkeypatch.setattr(settings, 'qcew_api_url', url)
+        start = time.perf_counter()
+        if error is None:
+            with_retries(fetch_cached, 'industry', 2021, 'a', code)
+        else:
+            with pytest.raises(error):
+                with_retries(fetch_cached, 'industry', 2021, 'a', code)
+        elapsed = time.perf_counter() - start
+    assert counts[f'/2021/a/industry/{code}.csv'] == requests
+    assert elapsed >= sum(BACKOFF * 2**attempt for attempt in range(requests - 1))
@@ -0,0 +1,31 @@
+"""
+Incremental solves of the yearly LPs
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+
+from app.states.incremental import IncrementalLP
+
+
+@pytest.mark.parametrize('backend', ['osqp', 'cvxpy'])
+@pytest.mark.parametrize('rows, variables', [(0, ['a', 'b']), (0, [])])
+def test_solve_without_suppressed_cells(backend, rows, variables):
+    lp = IncrementalLP(backend, {})
+    x, report = lp.solve(
+        sparse.csr_matrix((rows, len(variables))), np.zeros(rows), variables,
+        np.zeros(len(variables))
+    )
+    assert list(x) == [0.0] * len(variables)
+    assert report['status'] == 'empty'
+
+
+def test_inaccurate_warm_start_is_solved_again():
+    # min x1 + x2 subject to x1 + x2 >= 10, x1 <= 4, stopped after one iteration of OSQP
+    A = sparse.csr_matrix([[-1.0, -1.0], [1.0, 0.0]])
+    b = np.array([-10.0, 4.0])
+    lp = IncrementalLP('osqp', {'max_iter': 1})
+    x, report = lp.solve(A, b, ['a', 'b'], np.zeros(2))
+    assert not report['warm_start']
+    assert np.all(A @ x <= b + 1e-6) and np.all(x >= -1e-6)
+    assert x.sum() == pytest.approx(10.0)